@@ -1,7 +1,14 @@
 #!/usr/bin/python
 
 from __future__ import print_function
-import sys, getopt
+import sys, getopt, os, json, mmap
+from collections import deque, OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 inverse = 1
 log = 2
@@ -12,14 +19,29 @@ invshiftrows = 6
 mixcolumns = 7
 invmixcolumns = 8
 genttables = 9
+encrypt = 10
+decrypt = 11
+case_geninvttables = 12
+alog = 13
+ctr = 14
+ddt = 15
+lat = 16
+analyse = 17
 
 def main(argv):
 
     case = 0
+    key = None
+    cachefile = None
+    backend = None
+    iv = bytes(16)
+    workers = None
+    stream = False
+    hexmode = False
 
     # Parse options
     try:
-        oplist, args = getopt.getopt(argv, 'hialsSrRmMtT')
+        oplist, args = getopt.getopt(argv, 'hialsSrRmMtTe:d:c:nbx:I:j:fHDLA')
     except getopt.GetoptError as err:
         print(err, file=sys.stderr)
 
@@ -29,7 +51,7 @@ def main(argv):
         elif o == '-i':
             case = inverse
         elif o == '-a':
-            case = inverse
+            case = alog
         elif o == '-l':
             case = log
         elif o == '-s':
@@ -47,49 +69,109 @@ def main(argv):
         elif o == '-t':
             case = genttables
         elif o == '-T':
-            print_usage_and_exit(0)
+            case = case_geninvttables
+        elif o == '-e':
+            case = encrypt
+            key = bytes.fromhex(a)
+        elif o == '-d':
+            case = decrypt
+            key = bytes.fromhex(a)
+        elif o == '-c':
+            cachefile = a
+        elif o == '-n':
+            backend = batch_encrypt, batch_decrypt
+        elif o == '-b':
+            backend = bitslice_encrypt, bitslice_decrypt
+        elif o == '-x':
+            case = ctr
+            key = bytes.fromhex(a)
+        elif o == '-I':
+            iv = bytes.fromhex(a)
+        elif o == '-j':
+            workers = int(a)
+        elif o == '-f':
+            stream = True
+        elif o == '-H':
+            hexmode = True
+        elif o == '-D':
+            case = ddt
+        elif o == '-L':
+            case = lat
+        elif o == '-A':
+            case = analyse
         else:
             assert False, 'Unhandled option'
 
-    # Inverse/Alog
-    if case == inverse:
+    # Load the lookup tables from the cache file
+    if cachefile is not None and os.path.exists(cachefile):
+        loadtables(cachefile)
+        cachefile = None
+
+    # Streaming byte operations
+    if stream:
+        streamfuncs = {
+            subbytes: (stream_subbytes, 1),
+            invsubbytes: (stream_invsubbytes, 1),
+            shiftrows: (stream_shiftrows, 16),
+            invshiftrows: (stream_invshiftrows, 16),
+            mixcolumns: (stream_mixcolumns, 16),
+            invmixcolumns: (stream_invmixcolumns, 16),
+        }
+        if case not in streamfuncs or len(args) > 1:
+            print_usage_and_exit(1)
+        func, blocksize = streamfuncs[case]
+        fin = sys.stdin.buffer
+        if len(args) > 0:
+            fin = open(args[0], 'rb')
+        stream_transform(func, fin, sys.stdout.buffer, blocksize, hexmode)
+        if len(args) > 0:
+            fin.close()
+
+    # Inverse
+    elif case == inverse:
         if len(args) < 1:
             print_usage_and_exit(1)
-        invtable = geninvtable()
         for a in args:
             b = int(a, 16)
-            print('inv({:02x}) = {:02x}'.format(b, invtable[b]))
+            print('inv({:02x}) = {:02x}'.format(b, GF256.inv(b)))
+
+    # Alog
+    elif case == alog:
+        if len(args) < 1:
+            print_usage_and_exit(1)
+        for a in args:
+            b = int(a, 16)
+            print('alog({:x}) = {:02x}'.format(b, GF256.alog(b)))
 
     # Log
     elif case == log:
         if len(args) < 1:
             print_usage_and_exit(1)
-        invtable = geninvtable()
-        iargs = list()
         for a in args:
-            iargs.append(int(a, 16))
-        for i in range(len(invtable)):
-            if invtable[i] in iargs:
-                print('log({:x}) = {:x}'.format(invtable[i], i))
+            b = int(a, 16)
+            if b == 0:
+                print('log(0) = undefined')
+            else:
+                print('log({:x}) = {:x}'.format(b, GF256.log(b)))
 
     # SubBytes
     elif case == subbytes:
         if len(args) < 1:
             print_usage_and_exit(1)
-        invtable = geninvtable()
+        stable = gettable('sbox')
         for a in args:
             b = int(a, 16)
-            s = sbox(invtable[b])
+            s = stable[b]
             print('SBox {:02x}: {:02x}'.format(b, s))
 
     # InvSubBytes
     elif case == invsubbytes:
         if len(args) < 1:
             print_usage_and_exit(1)
-        invtable = geninvtable()
+        istable = gettable('invsbox')
         for a in args:
             s = int(a, 16)
-            b = invtable[invsbox(s)]
+            b = istable[s]
             print('InvSBox {:02x}: {:02x}'.format(s, b))
 
     # ShiftRows
@@ -190,10 +272,18 @@ def main(argv):
 
     # GenTTables
     elif case == genttables:
-        T0 = genttables([2, 1, 1, 3])
-        T1 = genttables([3, 2, 1, 1])
-        T2 = genttables([1, 3, 2, 1])
-        T3 = genttables([1, 1, 3, 2])
+        T0, T1, T2, T3 = gettables('T0', 'T1', 'T2', 'T3')
+        if len(args) > 0:
+            for a in args:
+                v = int(a, 16)
+                print(('{:02x}:' + ' {:08x}'*4).format(v, T0[v], T1[v], T2[v], T3[v]))
+        else:
+            for i in range(0, 0x100):
+                print(('{:02x}:' + ' {:08x}'*4).format(i, T0[i], T1[i], T2[i], T3[i]))
+
+    # GenInvTTables
+    elif case == case_geninvttables:
+        T0, T1, T2, T3 = gettables('Ti0', 'Ti1', 'Ti2', 'Ti3')
         if len(args) > 0:
             for a in args:
                 v = int(a, 16)
@@ -202,6 +292,62 @@ def main(argv):
             for i in range(0, 0x100):
                 print(('{:02x}:' + ' {:08x}'*4).format(i, T0[i], T1[i], T2[i], T3[i]))
 
+    # Encrypt/Decrypt file
+    elif case == encrypt or case == decrypt:
+        if len(key) not in (16, 24, 32) or len(args) > 2:
+            print_usage_and_exit(1)
+        # Read everything before opening the output, which may be the input
+        if len(args) > 0:
+            with open(args[0], 'rb') as fin:
+                data = fin.read()
+        else:
+            data = sys.stdin.buffer.read()
+        fout = sys.stdout.buffer
+        if len(args) > 1:
+            fout = open(args[1], 'wb')
+        w, dw = keyschedule(key)
+        if case == encrypt and backend is not None:
+            fout.write(backend[0](w, pad(data)))
+        elif case == encrypt:
+            fout.write(encrypt_ecb(w, data))
+        elif backend is not None:
+            if len(data) % 16 != 0:
+                raise ValueError('Ciphertext is not a multiple of the block size')
+            fout.write(unpad(backend[1](w, data)))
+        else:
+            fout.write(decrypt_ecb(dw, data))
+        if len(args) > 1:
+            fout.close()
+
+    # CTR mode file
+    elif case == ctr:
+        if len(key) not in (16, 24, 32) or len(iv) != 16 or len(args) not in (1, 2):
+            print_usage_and_exit(1)
+        ctr_file(keyschedule(key)[0], iv, args[0], args[1] if len(args) > 1 else None, workers)
+
+    # S-box analysis
+    elif case == ddt or case == lat or case == analyse:
+        if len(args) > 1:
+            print_usage_and_exit(1)
+        S = gettable('sbox')
+        if len(args) > 0:
+            with open(args[0], 'r') as f:
+                S = [int(v, 16) for v in f.read().replace(',', ' ').split()]
+        if case == ddt:
+            for a, row in enumerate(sbox_ddt(S)):
+                print('{:02x}:'.format(a) + ''.join(' {:3d}'.format(v) for v in row))
+        elif case == lat:
+            for a, row in enumerate(sbox_lat(S)):
+                print('{:02x}:'.format(a) + ''.join(' {:4d}'.format(v) for v in row))
+        else:
+            print('Differential uniformity: {}'.format(differential_uniformity(S)))
+            print('Nonlinearity: {}'.format(nonlinearity(S)))
+            print('Algebraic degree: {}'.format(algebraic_degree(S)))
+
+    # Store the lookup tables for later runs
+    if cachefile is not None:
+        savetables(cachefile)
+
 
 #####################################################################
 # Helping Functions
@@ -254,57 +400,970 @@ def invsbox(s):
 
 
 def mixcolumns(A, B):
-    ret = []
-    for i in range(0, 4):
-        t0 = A[i]
-        t1 = xtime(t0)
-        if B[i] == 1:
-            ret.append(t0)
-        elif B[i] == 2:
-            ret.append(t1)
-        elif B[i] == 3:
-            ret.append(t1 ^ t0)
-    return ret[0] ^ ret[1] ^ ret[2] ^ ret[3]
+    mul = GF256.mul
+    return mul(B[0], A[0]) ^ mul(B[1], A[1]) ^ mul(B[2], A[2]) ^ mul(B[3], A[3])
 
 
 def invmixcolumns(A, B):
+    return mixcolumns(A, B)
+
+
+def genttables(B, stable=None):
     ret = []
-    for i in range(0, 4):
-        t0 = A[i]
-        t1 = xtime(t0)
-        t2 = xtime(t1)
-        t3 = xtime(t2)
-        if B[i] == 0x9:
-            ret.append(t3 ^ t0)
-        elif B[i] == 0xb:
-            ret.append(t3 ^ t1 ^ t0)
-        elif B[i] == 0xd:
-            ret.append(t3 ^ t2 ^ t0)
-        elif B[i] == 0xe:
-            ret.append(t3 ^ t2 ^ t1)
-    return ret[0] ^ ret[1] ^ ret[2] ^ ret[3]
-
-
-def genttables(B):
-    ret = []
-    invtable = geninvtable()
+    if stable is None:
+        stable = gettable('sbox')
+    c0, c1, c2, c3 = [GF256.multable(b) for b in B]
     for i in range(0, 0x100):
-        s = sbox(invtable[i])
-        a = [s, s, s, s]
-        c = []
-        for j in range(0, 4):
-            t0 = s 
-            t1 = xtime(t0)
-            if B[j] == 1:
-                c.append(t0)
-            elif B[j] == 2:
-                c.append(t1)
-            elif B[j] == 3:
-                c.append(t1 ^ t0)
-        ret.append((c[0] << 24) | (c[1] << 16) | (c[2] << 8) | c[3])
+        s = stable[i]
+        ret.append((c0[s] << 24) | (c1[s] << 16) | (c2[s] << 8) | c3[s])
     return ret
 
 
+def geninvttables(B):
+    return genttables(B, gettable('invsbox'))
+
+
+#####################################################################
+# Lookup Tables
+#####################################################################
+
+_tables = {}
+
+def genalogtable():
+    alog = [1]
+    for i in range(1, 0x100):
+        alog.append(alog[-1] ^ xtime(alog[-1]))
+    return alog
+
+
+def genlogtable():
+    log = [0] * 0x100
+    alog = gettable('alog')
+    for i in range(0xFF):
+        log[alog[i]] = i
+    return log
+
+
+_builders = {
+    'inv': geninvtable,
+    'sbox': lambda: [sbox(b) for b in gettable('inv')],
+    'invsbox': lambda: [gettable('inv')[invsbox(s)] for s in range(0x100)],
+    'xtime': lambda: [xtime(a) for a in range(0x100)],
+    'alog': genalogtable,
+    'log': genlogtable,
+    'T0': lambda: genttables([2, 1, 1, 3]),
+    'T1': lambda: genttables([3, 2, 1, 1]),
+    'T2': lambda: genttables([1, 3, 2, 1]),
+    'T3': lambda: genttables([1, 1, 3, 2]),
+    'Ti0': lambda: geninvttables([0xe, 0x9, 0xd, 0xb]),
+    'Ti1': lambda: geninvttables([0xb, 0xe, 0x9, 0xd]),
+    'Ti2': lambda: geninvttables([0xd, 0xb, 0xe, 0x9]),
+    'Ti3': lambda: geninvttables([0x9, 0xd, 0xb, 0xe]),
+}
+
+
+def gettable(name):
+    """Returns the named lookup table, building it on first use"""
+    table = _tables.get(name)
+    if table is None:
+        table = _builders[name]()
+        _tables[name] = table
+    return table
+
+
+def gettables(*names):
+    return tuple(gettable(name) for name in names)
+
+
+def loadtables(path):
+    """Loads previously saved lookup tables into the process cache"""
+    with open(path, 'r') as f:
+        tables = json.load(f)
+    for name, table in tables.items():
+        if name in _builders and len(table) == 0x100:
+            _tables[name] = table
+
+
+def savetables(path):
+    """Builds every lookup table and stores them in a cache file"""
+    tables = {name: gettable(name) for name in _builders}
+    with open(path, 'w') as f:
+        json.dump(tables, f, separators=(',', ':'))
+
+
+#####################################################################
+# GF(2^8) Arithmetic
+#####################################################################
+
+class GF256(object):
+    """Element of GF(2^8) modulo the AES polynomial x^8 + x^4 + x^3 + x + 1
+
+    Multiplication, division, inversion, powers and logarithms are O(1)
+    lookups into the log/antilog tables with generator 03. The static
+    methods work on plain ints and bytes for use in hot loops.
+    """
+
+    __slots__ = ('value',)
+
+    _multables = {}
+
+    def __init__(self, value):
+        value = int(value)
+        if value < 0 or value > 0xFF:
+            raise ValueError('Invalid GF(2^8) element {}'.format(value))
+        self.value = value
+
+    @staticmethod
+    def mul(a, b):
+        if a == 0 or b == 0:
+            return 0
+        log, alog = gettables('log', 'alog')
+        return alog[(log[a] + log[b]) % 0xFF]
+
+    @staticmethod
+    def div(a, b):
+        if b == 0:
+            raise ZeroDivisionError('GF(2^8) division by zero')
+        if a == 0:
+            return 0
+        log, alog = gettables('log', 'alog')
+        return alog[(log[a] - log[b]) % 0xFF]
+
+    @staticmethod
+    def inv(a):
+        return gettable('inv')[a]
+
+    @staticmethod
+    def pow(a, e):
+        if a == 0:
+            if e < 0:
+                raise ZeroDivisionError('GF(2^8) inverse of zero')
+            return 1 if e == 0 else 0
+        log, alog = gettables('log', 'alog')
+        return alog[(log[a] * e) % 0xFF]
+
+    @staticmethod
+    def log(a):
+        if a == 0:
+            raise ValueError('GF(2^8) logarithm of zero')
+        return gettable('log')[a]
+
+    @staticmethod
+    def alog(e):
+        return gettable('alog')[e % 0xFF]
+
+    @classmethod
+    def multable(cls, c):
+        """Returns the 256 byte table of c * x for use with bytes.translate"""
+        table = cls._multables.get(c)
+        if table is None:
+            table = bytes(cls.mul(c, x) for x in range(0x100))
+            cls._multables[c] = table
+        return table
+
+    @classmethod
+    def mulbytes(cls, c, data):
+        """Returns c * x for every byte x of data"""
+        return data.translate(cls.multable(c))
+
+    @staticmethod
+    def invbytes(data):
+        return data.translate(bytes(gettable('inv')))
+
+    @staticmethod
+    def addbytes(a, b):
+        """Returns the bytewise sum (xor) of two equal length byte strings"""
+        if len(a) != len(b):
+            raise ValueError('Length mismatch')
+        return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+    @classmethod
+    def mulvec(cls, a, b):
+        """Returns the bytewise product of two equal length byte strings"""
+        if len(a) != len(b):
+            raise ValueError('Length mismatch')
+        mul = cls.mul
+        return bytes(mul(x, y) for x, y in zip(a, b))
+
+    def __add__(self, other):
+        return GF256(self.value ^ int(other))
+
+    __radd__ = __add__
+    __sub__ = __add__
+    __rsub__ = __add__
+
+    def __mul__(self, other):
+        return GF256(GF256.mul(self.value, int(other)))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return GF256(GF256.div(self.value, int(other)))
+
+    def __rtruediv__(self, other):
+        return GF256(GF256.div(int(other), self.value))
+
+    def __pow__(self, e):
+        return GF256(GF256.pow(self.value, e))
+
+    def __invert__(self):
+        return GF256(GF256.inv(self.value))
+
+    def __int__(self):
+        return self.value
+
+    __index__ = __int__
+
+    def __eq__(self, other):
+        return self.value == int(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return 'GF256(0x{:02x})'.format(self.value)
+
+
+#####################################################################
+# AES Cipher
+#####################################################################
+
+def expandkey(key):
+    """Returns the 4 * (Nr + 1) round key words for a 16, 24 or 32 byte key"""
+    if len(key) not in (16, 24, 32):
+        raise ValueError('Invalid AES key length {}'.format(len(key)))
+    S = gettable('sbox')
+    Nk = len(key) // 4
+    Nr = Nk + 6
+    w = [int.from_bytes(key[4*i:4*i + 4], 'big') for i in range(Nk)]
+    rcon = 1
+    for i in range(Nk, 4 * (Nr + 1)):
+        t = w[i - 1]
+        if i % Nk == 0:
+            t = ((S[(t >> 16) & 0xFF] << 24) | (S[(t >> 8) & 0xFF] << 16) |
+                    (S[t & 0xFF] << 8) | S[t >> 24]) ^ (rcon << 24)
+            rcon = xtime(rcon)
+        elif Nk > 6 and i % Nk == 4:
+            t = ((S[t >> 24] << 24) | (S[(t >> 16) & 0xFF] << 16) |
+                    (S[(t >> 8) & 0xFF] << 8) | S[t & 0xFF])
+        w.append(w[i - Nk] ^ t)
+    return w
+
+
+def encrypt_block(w, block):
+    """Encrypts one 16 byte block with the round keys from expandkey (or a raw key)"""
+    if isinstance(w, (bytes, bytearray)):
+        w = keyschedule(w)[0]
+    S, T0, T1, T2, T3 = gettables('sbox', 'T0', 'T1', 'T2', 'T3')
+    Nr = len(w) // 4 - 1
+    s0 = int.from_bytes(block[0:4], 'big') ^ w[0]
+    s1 = int.from_bytes(block[4:8], 'big') ^ w[1]
+    s2 = int.from_bytes(block[8:12], 'big') ^ w[2]
+    s3 = int.from_bytes(block[12:16], 'big') ^ w[3]
+    for r in range(4, 4 * Nr, 4):
+        t0 = T0[s0 >> 24] ^ T1[(s1 >> 16) & 0xFF] ^ T2[(s2 >> 8) & 0xFF] ^ T3[s3 & 0xFF] ^ w[r]
+        t1 = T0[s1 >> 24] ^ T1[(s2 >> 16) & 0xFF] ^ T2[(s3 >> 8) & 0xFF] ^ T3[s0 & 0xFF] ^ w[r + 1]
+        t2 = T0[s2 >> 24] ^ T1[(s3 >> 16) & 0xFF] ^ T2[(s0 >> 8) & 0xFF] ^ T3[s1 & 0xFF] ^ w[r + 2]
+        t3 = T0[s3 >> 24] ^ T1[(s0 >> 16) & 0xFF] ^ T2[(s1 >> 8) & 0xFF] ^ T3[s2 & 0xFF] ^ w[r + 3]
+        s0, s1, s2, s3 = t0, t1, t2, t3
+    r = 4 * Nr
+    t0 = ((S[s0 >> 24] << 24) | (S[(s1 >> 16) & 0xFF] << 16) |
+            (S[(s2 >> 8) & 0xFF] << 8) | S[s3 & 0xFF]) ^ w[r]
+    t1 = ((S[s1 >> 24] << 24) | (S[(s2 >> 16) & 0xFF] << 16) |
+            (S[(s3 >> 8) & 0xFF] << 8) | S[s0 & 0xFF]) ^ w[r + 1]
+    t2 = ((S[s2 >> 24] << 24) | (S[(s3 >> 16) & 0xFF] << 16) |
+            (S[(s0 >> 8) & 0xFF] << 8) | S[s1 & 0xFF]) ^ w[r + 2]
+    t3 = ((S[s3 >> 24] << 24) | (S[(s0 >> 16) & 0xFF] << 16) |
+            (S[(s1 >> 8) & 0xFF] << 8) | S[s2 & 0xFF]) ^ w[r + 3]
+    return ((t0 << 96) | (t1 << 64) | (t2 << 32) | t3).to_bytes(16, 'big')
+
+
+def invexpandkey(w):
+    """Returns the equivalent inverse cipher round keys for the expandkey words
+
+    The round keys are in reverse order and rounds 1..Nr-1 have
+    InvMixColumns applied so decryption can use the inverse T-tables.
+    """
+    S, Ti0, Ti1, Ti2, Ti3 = gettables('sbox', 'Ti0', 'Ti1', 'Ti2', 'Ti3')
+    Nr = len(w) // 4 - 1
+    dw = []
+    for r in range(Nr, -1, -1):
+        for t in w[4*r:4*r + 4]:
+            if 0 < r < Nr:
+                t = (Ti0[S[t >> 24]] ^ Ti1[S[(t >> 16) & 0xFF]] ^
+                        Ti2[S[(t >> 8) & 0xFF]] ^ Ti3[S[t & 0xFF]])
+            dw.append(t)
+    return dw
+
+
+KEYCACHE_SIZE = 64
+
+KeyCacheInfo = namedtuple('KeyCacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class KeyCache(object):
+    """Bounded LRU cache of (expandkey, invexpandkey) round keys by raw key"""
+
+    def __init__(self, maxsize=KEYCACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+
+    def get(self, key):
+        key = bytes(key)
+        entry = self.__entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        w = expandkey(key)
+        entry = (w, invexpandkey(w))
+        if self.maxsize > 0:
+            self.__entries[key] = entry
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+        return entry
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len(self.__entries) > max(maxsize, 0):
+            self.__entries.popitem(last=False)
+
+    def clear(self):
+        self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return KeyCacheInfo(self.hits, self.misses, self.maxsize, len(self.__entries))
+
+
+keycache = KeyCache()
+
+def keyschedule(key):
+    """Returns the cached (encryption, decryption) round keys for a raw key"""
+    return keycache.get(key)
+
+
+def decrypt_block(dw, block):
+    """Decrypts one 16 byte block with the round keys from invexpandkey (or a raw key)"""
+    if isinstance(dw, (bytes, bytearray)):
+        dw = keyschedule(dw)[1]
+    Si, Ti0, Ti1, Ti2, Ti3 = gettables('invsbox', 'Ti0', 'Ti1', 'Ti2', 'Ti3')
+    Nr = len(dw) // 4 - 1
+    s0 = int.from_bytes(block[0:4], 'big') ^ dw[0]
+    s1 = int.from_bytes(block[4:8], 'big') ^ dw[1]
+    s2 = int.from_bytes(block[8:12], 'big') ^ dw[2]
+    s3 = int.from_bytes(block[12:16], 'big') ^ dw[3]
+    for r in range(4, 4 * Nr, 4):
+        t0 = Ti0[s0 >> 24] ^ Ti1[(s3 >> 16) & 0xFF] ^ Ti2[(s2 >> 8) & 0xFF] ^ Ti3[s1 & 0xFF] ^ dw[r]
+        t1 = Ti0[s1 >> 24] ^ Ti1[(s0 >> 16) & 0xFF] ^ Ti2[(s3 >> 8) & 0xFF] ^ Ti3[s2 & 0xFF] ^ dw[r + 1]
+        t2 = Ti0[s2 >> 24] ^ Ti1[(s1 >> 16) & 0xFF] ^ Ti2[(s0 >> 8) & 0xFF] ^ Ti3[s3 & 0xFF] ^ dw[r + 2]
+        t3 = Ti0[s3 >> 24] ^ Ti1[(s2 >> 16) & 0xFF] ^ Ti2[(s1 >> 8) & 0xFF] ^ Ti3[s0 & 0xFF] ^ dw[r + 3]
+        s0, s1, s2, s3 = t0, t1, t2, t3
+    r = 4 * Nr
+    t0 = ((Si[s0 >> 24] << 24) | (Si[(s3 >> 16) & 0xFF] << 16) |
+            (Si[(s2 >> 8) & 0xFF] << 8) | Si[s1 & 0xFF]) ^ dw[r]
+    t1 = ((Si[s1 >> 24] << 24) | (Si[(s0 >> 16) & 0xFF] << 16) |
+            (Si[(s3 >> 8) & 0xFF] << 8) | Si[s2 & 0xFF]) ^ dw[r + 1]
+    t2 = ((Si[s2 >> 24] << 24) | (Si[(s1 >> 16) & 0xFF] << 16) |
+            (Si[(s0 >> 8) & 0xFF] << 8) | Si[s3 & 0xFF]) ^ dw[r + 2]
+    t3 = ((Si[s3 >> 24] << 24) | (Si[(s2 >> 16) & 0xFF] << 16) |
+            (Si[(s1 >> 8) & 0xFF] << 8) | Si[s0 & 0xFF]) ^ dw[r + 3]
+    return ((t0 << 96) | (t1 << 64) | (t2 << 32) | t3).to_bytes(16, 'big')
+
+
+def pad(data):
+    n = 16 - (len(data) % 16)
+    return data + bytes([n] * n)
+
+
+def unpad(data):
+    n = data[-1] if len(data) > 0 else 0
+    if n < 1 or n > 16 or data[-n:] != bytes([n] * n):
+        raise ValueError('Invalid padding')
+    return data[:-n]
+
+
+def encrypt_ecb(w, data):
+    """Pads and encrypts data in ECB mode"""
+    if isinstance(w, (bytes, bytearray)):
+        w = keyschedule(w)[0]
+    data = pad(data)
+    return b''.join(encrypt_block(w, data[i:i + 16]) for i in range(0, len(data), 16))
+
+
+def decrypt_ecb(dw, data):
+    """Decrypts and unpads data in ECB mode with the invexpandkey round keys"""
+    if isinstance(dw, (bytes, bytearray)):
+        dw = keyschedule(dw)[1]
+    if len(data) % 16 != 0:
+        raise ValueError('Ciphertext is not a multiple of the block size')
+    return unpad(b''.join(decrypt_block(dw, data[i:i + 16]) for i in range(0, len(data), 16)))
+
+
+#####################################################################
+# NumPy Batched State Operations
+#####################################################################
+
+# ShiftRows/InvShiftRows as permutations of the flattened (row, column) state
+_shiftrows_perm = [4 * r + (c + r) % 4 for r in range(4) for c in range(4)]
+_invshiftrows_perm = [4 * r + (c - r) % 4 for r in range(4) for c in range(4)]
+
+_nptables = {}
+
+def nptable(name):
+    """Returns a lookup table from gettable as a uint8 NumPy array"""
+    table = _nptables.get(name)
+    if table is None:
+        if np is None:
+            raise ImportError('The batched AES backend requires NumPy')
+        table = np.array(gettable(name), dtype=np.uint8)
+        _nptables[name] = table
+    return table
+
+
+def npmultable(c):
+    return np.frombuffer(GF256.multable(c), dtype=np.uint8)
+
+
+def tostates(data):
+    """Returns the 16 byte blocks of data as an (N, 4, 4) array of states
+
+    Blocks are read column major like FIPS-197, so states[n, r, c] is byte
+    r + 4c of block n.
+    """
+    if np is None:
+        raise ImportError('The batched AES backend requires NumPy')
+    if len(data) % 16 != 0:
+        raise ValueError('Data is not a multiple of the block size')
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, 4, 4).transpose(0, 2, 1)
+
+
+def fromstates(states):
+    return np.ascontiguousarray(states.transpose(0, 2, 1)).tobytes()
+
+
+def batch_subbytes(states):
+    return nptable('sbox')[states]
+
+
+def batch_invsubbytes(states):
+    return nptable('invsbox')[states]
+
+
+def batch_shiftrows(states):
+    return states.reshape(-1, 16)[:, _shiftrows_perm].reshape(-1, 4, 4)
+
+
+def batch_invshiftrows(states):
+    return states.reshape(-1, 16)[:, _invshiftrows_perm].reshape(-1, 4, 4)
+
+
+def batch_mixcolumns(states):
+    # out[r] = 2a[r] ^ 3a[r+1] ^ a[r+2] ^ a[r+3]
+    x = nptable('xtime')[states]
+    a1 = np.roll(states, -1, axis=1)
+    return (x ^ np.roll(x, -1, axis=1) ^ a1 ^
+            np.roll(states, -2, axis=1) ^ np.roll(states, -3, axis=1))
+
+
+def batch_invmixcolumns(states):
+    # out[r] = e*a[r] ^ b*a[r+1] ^ d*a[r+2] ^ 9*a[r+3]
+    return (npmultable(0xe)[states] ^
+            npmultable(0xb)[np.roll(states, -1, axis=1)] ^
+            npmultable(0xd)[np.roll(states, -2, axis=1)] ^
+            npmultable(0x9)[np.roll(states, -3, axis=1)])
+
+
+def batch_roundkeys(w):
+    """Returns the expandkey words as an (Nr + 1, 4, 4) array of round key states"""
+    rk = b''.join(t.to_bytes(4, 'big') for t in w)
+    return tostates(rk)
+
+
+def batch_encrypt(w, data):
+    """Encrypts every 16 byte block of data (ECB) with NumPy"""
+    rk = batch_roundkeys(w)
+    Nr = len(rk) - 1
+    states = tostates(data) ^ rk[0]
+    for r in range(1, Nr):
+        states = batch_mixcolumns(batch_shiftrows(batch_subbytes(states))) ^ rk[r]
+    states = batch_shiftrows(batch_subbytes(states)) ^ rk[Nr]
+    return fromstates(states)
+
+
+def batch_decrypt(w, data):
+    """Decrypts every 16 byte block of data (ECB) with NumPy"""
+    rk = batch_roundkeys(w)
+    Nr = len(rk) - 1
+    states = tostates(data) ^ rk[Nr]
+    for r in range(Nr - 1, 0, -1):
+        states = batch_invsubbytes(batch_invshiftrows(states)) ^ rk[r]
+        states = batch_invmixcolumns(states)
+    states = batch_invsubbytes(batch_invshiftrows(states)) ^ rk[0]
+    return fromstates(states)
+
+
+#####################################################################
+# Bitsliced AES
+#####################################################################
+
+# Slice 8*i + b holds bit b (0 = LSB) of state byte i for every block, with
+# block k in bit k of the Python int. SubBytes is a fixed boolean circuit,
+# ShiftRows a permutation of the slices and MixColumns only xors, so each
+# operation processes every block at once without secret-indexed lookups.
+
+BITSLICE_BLOCKS = 1 << 16
+
+_tochars = bytes.maketrans(b'\x00\x01', b'01')
+_fromchars = bytes.maketrans(b'01', b'\x00\x01')
+
+def bitslice(data):
+    """Returns the 128 bit slices of the 16 byte blocks of data"""
+    n = len(data) // 16
+    ones = int.from_bytes(b'\x01' * n, 'little')
+    slices = []
+    for i in range(16):
+        col = int.from_bytes(data[i::16], 'little')
+        for b in range(8):
+            spread = ((col >> b) & ones).to_bytes(n, 'little')
+            slices.append(int(spread[::-1].translate(_tochars), 2) if n > 0 else 0)
+    return slices
+
+
+def unbitslice(slices, n):
+    """Returns the n blocks held in 128 bit slices as bytes"""
+    out = bytearray(16 * n)
+    fmt = '0{}b'.format(n)
+    for i in range(16):
+        col = 0
+        for b in range(8):
+            bits = format(slices[8*i + b], fmt).encode('ascii')[::-1].translate(_fromchars)
+            col |= int.from_bytes(bits, 'little') << b
+        out[i::16] = col.to_bytes(n, 'little')
+    return bytes(out)
+
+
+def bs_sbox(U0, U1, U2, U3, U4, U5, U6, U7, one):
+    """Boyar-Peralta 113 gate S-box circuit, arguments and results MSB first"""
+    T1 = U0 ^ U3; T2 = U0 ^ U5; T3 = U0 ^ U6; T4 = U3 ^ U5; T5 = U4 ^ U6
+    T6 = T1 ^ T5; T7 = U1 ^ U2; T8 = U7 ^ T6; T9 = U7 ^ T7; T10 = T6 ^ T7
+    T11 = U1 ^ U5; T12 = U2 ^ U5; T13 = T3 ^ T4; T14 = T6 ^ T11; T15 = T5 ^ T11
+    T16 = T5 ^ T12; T17 = T9 ^ T16; T18 = U3 ^ U7; T19 = T7 ^ T18; T20 = T1 ^ T19
+    T21 = U6 ^ U7; T22 = T7 ^ T21; T23 = T2 ^ T22; T24 = T2 ^ T10; T25 = T20 ^ T17
+    T26 = T3 ^ T16; T27 = T1 ^ T12
+    M1 = T13 & T6; M2 = T23 & T8; M3 = T14 ^ M1; M4 = T19 & U7; M5 = M4 ^ M1
+    M6 = T3 & T16; M7 = T22 & T9; M8 = T26 ^ M6; M9 = T20 & T17; M10 = M9 ^ M6
+    M11 = T1 & T15; M12 = T4 & T27; M13 = M12 ^ M11; M14 = T2 & T10; M15 = M14 ^ M11
+    M16 = M3 ^ M2; M17 = M5 ^ T24; M18 = M8 ^ M7; M19 = M10 ^ M15; M20 = M16 ^ M13
+    M21 = M17 ^ M15; M22 = M18 ^ M13; M23 = M19 ^ T25; M24 = M22 ^ M23; M25 = M22 & M20
+    M26 = M21 ^ M25; M27 = M20 ^ M21; M28 = M23 ^ M25; M29 = M28 & M27; M30 = M26 & M24
+    M31 = M20 & M23; M32 = M27 & M31; M33 = M27 ^ M25; M34 = M21 & M22; M35 = M24 & M34
+    M36 = M24 ^ M25; M37 = M21 ^ M29; M38 = M32 ^ M33; M39 = M23 ^ M30; M40 = M35 ^ M36
+    M41 = M38 ^ M40; M42 = M37 ^ M39; M43 = M37 ^ M38; M44 = M39 ^ M40; M45 = M42 ^ M41
+    M46 = M44 & T6; M47 = M40 & T8; M48 = M39 & U7; M49 = M43 & T16; M50 = M38 & T9
+    M51 = M37 & T17; M52 = M42 & T15; M53 = M45 & T27; M54 = M41 & T10; M55 = M44 & T13
+    M56 = M40 & T23; M57 = M39 & T19; M58 = M43 & T3; M59 = M38 & T22; M60 = M37 & T20
+    M61 = M42 & T1; M62 = M45 & T4; M63 = M41 & T2
+    L0 = M61 ^ M62; L1 = M50 ^ M56; L2 = M46 ^ M48; L3 = M47 ^ M55; L4 = M54 ^ M58
+    L5 = M49 ^ M61; L6 = M62 ^ L5; L7 = M46 ^ L3; L8 = M51 ^ M59; L9 = M52 ^ M53
+    L10 = M53 ^ L4; L11 = M60 ^ L2; L12 = M48 ^ M51; L13 = M50 ^ L0; L14 = M52 ^ M61
+    L15 = M55 ^ L1; L16 = M56 ^ L0; L17 = M57 ^ L1; L18 = M58 ^ L8; L19 = M63 ^ L4
+    L20 = L0 ^ L1; L21 = L1 ^ L7; L22 = L3 ^ L12; L23 = L18 ^ L2; L24 = L15 ^ L9
+    L25 = L6 ^ L10; L26 = L7 ^ L9; L27 = L8 ^ L10; L28 = L11 ^ L14; L29 = L11 ^ L17
+    return (L6 ^ L24, L16 ^ L26 ^ one, L19 ^ L28 ^ one, L6 ^ L21,
+            L20 ^ L22, L25 ^ L29, L13 ^ L27 ^ one, L6 ^ L23 ^ one)
+
+
+def bs_invaffine(x, one):
+    """Bitsliced invsbox(): the inverse affine map, LSB first"""
+    return [x[(j - 1) % 8] ^ x[(j - 3) % 8] ^ x[(j - 6) % 8] ^ (one if j in (0, 2) else 0)
+            for j in range(8)]
+
+
+def bs_subbytes(slices, one):
+    out = []
+    for i in range(0, 128, 8):
+        out.extend(reversed(bs_sbox(*reversed(slices[i:i + 8]), one=one)))
+    return out
+
+
+def bs_invsubbytes(slices, one):
+    # InvSubBytes(y) = L(SubBytes(L(y))) with L the inverse affine map
+    out = []
+    for i in range(0, 128, 8):
+        x = bs_invaffine(slices[i:i + 8], one)
+        x = list(reversed(bs_sbox(*reversed(x), one=one)))
+        out.extend(bs_invaffine(x, one))
+    return out
+
+
+_bs_shiftrows_perm = [8 * ((r + 4 * ((c + r) % 4))) + b
+        for c in range(4) for r in range(4) for b in range(8)]
+_bs_invshiftrows_perm = [8 * ((r + 4 * ((c - r) % 4))) + b
+        for c in range(4) for r in range(4) for b in range(8)]
+
+def bs_shiftrows(slices):
+    return [slices[j] for j in _bs_shiftrows_perm]
+
+
+def bs_invshiftrows(slices):
+    return [slices[j] for j in _bs_invshiftrows_perm]
+
+
+def bs_xtime(a):
+    return [a[7], a[0] ^ a[7], a[1], a[2] ^ a[7], a[3] ^ a[7], a[4], a[5], a[6]]
+
+
+def bs_mixcolumns(slices):
+    out = []
+    for c in range(0, 128, 32):
+        a = [slices[c + 8*r:c + 8*r + 8] for r in range(4)]
+        x = [bs_xtime(a[r]) for r in range(4)]
+        for r in range(4):
+            r1, r2, r3 = (r + 1) % 4, (r + 2) % 4, (r + 3) % 4
+            out.extend(x[r][b] ^ x[r1][b] ^ a[r1][b] ^ a[r2][b] ^ a[r3][b] for b in range(8))
+    return out
+
+
+def bs_invmixcolumns(slices):
+    # InvMixColumns = MixColumns after adding 4*(a0 ^ a2), 4*(a1 ^ a3) to the rows
+    out = list(slices)
+    for c in range(0, 128, 32):
+        a = [slices[c + 8*r:c + 8*r + 8] for r in range(4)]
+        u = bs_xtime(bs_xtime([a[0][b] ^ a[2][b] for b in range(8)]))
+        v = bs_xtime(bs_xtime([a[1][b] ^ a[3][b] for b in range(8)]))
+        for b in range(8):
+            out[c + b] ^= u[b]
+            out[c + 8 + b] ^= v[b]
+            out[c + 16 + b] ^= u[b]
+            out[c + 24 + b] ^= v[b]
+    return bs_mixcolumns(out)
+
+
+def bs_addroundkey(slices, rk, one):
+    return [s ^ one if k else s for s, k in zip(slices, rk)]
+
+
+def bs_roundkeys(w):
+    """Returns the expandkey words as 128 key bits per round in slice order"""
+    rks = []
+    for r in range(len(w) // 4):
+        rk = b''.join(t.to_bytes(4, 'big') for t in w[4*r:4*r + 4])
+        rks.append([(rk[i] >> b) & 1 for i in range(16) for b in range(8)])
+    return rks
+
+
+def bitslice_encrypt(w, data, blocks=BITSLICE_BLOCKS):
+    """Encrypts every 16 byte block of data (ECB) with bitsliced AES"""
+    if len(data) % 16 != 0:
+        raise ValueError('Data is not a multiple of the block size')
+    rks = bs_roundkeys(w)
+    Nr = len(rks) - 1
+    out = []
+    for start in range(0, len(data), 16 * blocks):
+        chunk = data[start:start + 16 * blocks]
+        n = len(chunk) // 16
+        one = (1 << n) - 1
+        slices = bs_addroundkey(bitslice(chunk), rks[0], one)
+        for r in range(1, Nr):
+            slices = bs_mixcolumns(bs_shiftrows(bs_subbytes(slices, one)))
+            slices = bs_addroundkey(slices, rks[r], one)
+        slices = bs_shiftrows(bs_subbytes(slices, one))
+        out.append(unbitslice(bs_addroundkey(slices, rks[Nr], one), n))
+    return b''.join(out)
+
+
+def bitslice_decrypt(w, data, blocks=BITSLICE_BLOCKS):
+    """Decrypts every 16 byte block of data (ECB) with bitsliced AES"""
+    if len(data) % 16 != 0:
+        raise ValueError('Data is not a multiple of the block size')
+    rks = bs_roundkeys(w)
+    Nr = len(rks) - 1
+    out = []
+    for start in range(0, len(data), 16 * blocks):
+        chunk = data[start:start + 16 * blocks]
+        n = len(chunk) // 16
+        one = (1 << n) - 1
+        slices = bs_addroundkey(bitslice(chunk), rks[Nr], one)
+        for r in range(Nr - 1, 0, -1):
+            slices = bs_invsubbytes(bs_invshiftrows(slices), one)
+            slices = bs_invmixcolumns(bs_addroundkey(slices, rks[r], one))
+        slices = bs_invsubbytes(bs_invshiftrows(slices), one)
+        out.append(unbitslice(bs_addroundkey(slices, rks[0], one), n))
+    return b''.join(out)
+
+
+#####################################################################
+# S-box Analysis
+#####################################################################
+
+def sbox_array(S):
+    """Returns S as an integer NumPy array after checking it is n bit to n bit"""
+    if np is None:
+        raise ImportError('S-box analysis requires NumPy')
+    S = np.asarray(S, dtype=np.int64)
+    n = len(S)
+    if n < 2 or n & (n - 1) != 0 or S.min() < 0 or S.max() >= n:
+        raise ValueError('Invalid S-box: expected 2^n entries of n bits')
+    return S
+
+
+def fwht(a, axis=-1):
+    """Returns the (unnormalised) Walsh-Hadamard transform along an axis"""
+    a = np.moveaxis(np.array(a, dtype=np.int64), axis, -1)
+    shape = a.shape
+    n = shape[-1]
+    h = 1
+    while h < n:
+        a = a.reshape(-1, n // (2 * h), 2, h)
+        x, y = a[:, :, 0, :], a[:, :, 1, :]
+        a = np.stack((x + y, x - y), axis=2)
+        h *= 2
+    return np.moveaxis(a.reshape(shape), -1, axis)
+
+
+def sbox_ddt(S):
+    """Returns the difference distribution table DDT[a, b] = #{x : S(x) ^ S(x ^ a) = b}"""
+    S = sbox_array(S)
+    n = len(S)
+    x = np.arange(n)
+    D = S[x[None, :] ^ x[:, None]] ^ S[None, :]
+    return np.bincount((x[:, None] * n + D).ravel(), minlength=n * n).reshape(n, n)
+
+
+def sbox_lat(S):
+    """Returns the linear approximation table LAT[a, b] = #{x : a.x = b.S(x)} - n/2"""
+    S = sbox_array(S)
+    n = len(S)
+    parity = np.zeros(n, dtype=np.int64)
+    for i in range(1, n):
+        parity[i] = parity[i >> 1] ^ (i & 1)
+    # Row b holds (-1)^(b.S(x)), transforming over x gives the Walsh spectrum
+    F = 1 - 2 * parity[np.arange(n)[:, None] & S[None, :]]
+    return fwht(F, axis=1).T // 2
+
+
+def differential_uniformity(S):
+    return int(sbox_ddt(S)[1:].max())
+
+
+def nonlinearity(S):
+    lat = sbox_lat(S)
+    return len(lat) // 2 - int(np.abs(lat[:, 1:]).max())
+
+
+def algebraic_degree(S):
+    """Returns the maximum ANF degree of the coordinate functions of S"""
+    S = sbox_array(S)
+    n = len(S)
+    bits = n.bit_length() - 1
+    # Binary Moebius transform of every coordinate at once
+    anf = (S[None, :] >> np.arange(bits)[:, None]) & 1
+    h = 1
+    while h < n:
+        anf = anf.reshape(bits, n // (2 * h), 2, h)
+        anf[:, :, 1, :] ^= anf[:, :, 0, :]
+        anf = anf.reshape(bits, n)
+        h *= 2
+    weights = np.array([bin(u).count('1') for u in range(n)])
+    monomials = anf.any(axis=0)
+    return int(weights[monomials].max()) if monomials.any() else 0
+
+
+#####################################################################
+# Streaming Byte Operations
+#####################################################################
+
+# The stream functions work on whole buffers of 16 byte blocks in FIPS-197
+# (column major) order, one strided slice per state byte.
+
+STREAM_CHUNK = 1 << 20
+
+_bytetables = {}
+
+def bytetable(name):
+    """Returns a lookup table from gettable as bytes for bytes.translate"""
+    table = _bytetables.get(name)
+    if table is None:
+        table = bytes(gettable(name))
+        _bytetables[name] = table
+    return table
+
+
+def stream_subbytes(data):
+    return data.translate(bytetable('sbox'))
+
+
+def stream_invsubbytes(data):
+    return data.translate(bytetable('invsbox'))
+
+
+def stream_permute(data, perm):
+    out = bytearray(len(data))
+    for i in range(16):
+        out[i::16] = data[perm[i]::16]
+    return bytes(out)
+
+
+def stream_shiftrows(data):
+    return stream_permute(data, [r + 4 * ((c + r) % 4) for c in range(4) for r in range(4)])
+
+
+def stream_invshiftrows(data):
+    return stream_permute(data, [r + 4 * ((c - r) % 4) for c in range(4) for r in range(4)])
+
+
+def stream_mixcolumns(data):
+    return stream_mixbytes(data, [2, 3, 1, 1])
+
+
+def stream_invmixcolumns(data):
+    return stream_mixbytes(data, [0xe, 0xb, 0xd, 0x9])
+
+
+def stream_mixbytes(data, B):
+    """Multiplies every column of every block by the circulant matrix of B"""
+    n = len(data) // 16
+    out = bytearray(len(data))
+    for c in range(4):
+        col = [int.from_bytes(data[4*c + r::16], 'big') for r in range(4)]
+        mul = [[int.from_bytes(data[4*c + r::16].translate(GF256.multable(b)), 'big')
+            if b != 1 else col[r] for r in range(4)] for b in B]
+        for r in range(4):
+            v = (mul[0][r] ^ mul[1][(r + 1) % 4] ^ mul[2][(r + 2) % 4] ^
+                    mul[3][(r + 3) % 4])
+            out[4*c + r::16] = v.to_bytes(n, 'big')
+    return bytes(out)
+
+
+def stream_transform(func, fin, fout, blocksize=1, hexmode=False, chunk=STREAM_CHUNK):
+    """Applies func to the raw or hex input in large chunks of whole blocks"""
+    digits = b''
+    rest = b''
+    row = b''
+    while True:
+        data = fin.read(chunk)
+        if len(data) == 0:
+            break
+        if hexmode:
+            # Hex digit pairs may be split across reads
+            digits += b''.join(data.split())
+            n = len(digits) & ~1
+            data = bytes.fromhex(digits[:n].decode('ascii'))
+            digits = digits[n:]
+        data = rest + data
+        n = len(data) - len(data) % blocksize
+        data, rest = data[:n], data[n:]
+        if n > 0:
+            data = func(data)
+            if hexmode:
+                # Keep rows 16 bytes wide whatever the read boundaries
+                data = row + data
+                n = len(data) - len(data) % 16
+                data, row = data[:n], data[n:]
+                if n == 0:
+                    continue
+                data = data.hex('\n', -16).encode('ascii') + b'\n'
+            fout.write(data)
+    if len(row) > 0:
+        fout.write(row.hex().encode('ascii') + b'\n')
+    fout.flush()
+    if len(digits) > 0:
+        raise ValueError('Odd number of hex digits in the input')
+    if len(rest) > 0:
+        raise ValueError('Input is not a multiple of the block size')
+
+
+#####################################################################
+# CTR Mode
+#####################################################################
+
+CTR_CHUNK = 1 << 20
+
+def ctr_keystream(w, counter, nblocks):
+    """Returns nblocks of keystream starting at the 128 bit counter"""
+    blocks = b''.join(((counter + i) & ((1 << 128) - 1)).to_bytes(16, 'big')
+            for i in range(nblocks))
+    return bitslice_encrypt(w, blocks)
+
+
+def xorbytes(a, b):
+    """Returns a xor b truncated to the length of a"""
+    n = len(a)
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b[:n], 'big')).to_bytes(n, 'big')
+
+
+def ctr_xor(w, iv, data, offset=0):
+    """Encrypts/decrypts data in CTR mode, data starting at a block aligned offset"""
+    nblocks = (len(data) + 15) // 16
+    counter = int.from_bytes(iv, 'big') + offset // 16
+    return xorbytes(data, ctr_keystream(w, counter, nblocks))
+
+
+def ctr_file(w, iv, inpath, outpath, workers=None, chunk=CTR_CHUNK):
+    """Encrypts/decrypts a file in CTR mode across a process pool
+
+    The counter space is split into chunk sized pieces whose keystream is
+    generated by the workers from the round keys and a starting counter.
+    The keystream is xored into mmap slices of the input and output files,
+    so neither file is ever read into memory as a whole. Without an output
+    file (or when it is the input) the input is transformed in place.
+    """
+    chunk -= chunk % 16
+    if chunk <= 0:
+        raise ValueError('Invalid chunk size')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    counter = int.from_bytes(iv, 'big')
+    size = os.path.getsize(inpath)
+    inplace = outpath is None or (os.path.exists(outpath) and os.path.samefile(inpath, outpath))
+    if size == 0:
+        if not inplace:
+            open(outpath, 'wb').close()
+        return
+    if inplace:
+        # One writable mapping, the keystream is xored over the input
+        with open(inpath, 'r+b') as f:
+            buf = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_WRITE)
+            try:
+                ctr_mmap(w, counter, buf, buf, size, workers, chunk)
+            finally:
+                buf.flush()
+                buf.close()
+        return
+    with open(inpath, 'rb') as fin, open(outpath, 'w+b') as fout:
+        fout.truncate(size)
+        src = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        dst = mmap.mmap(fout.fileno(), size)
+        try:
+            ctr_mmap(w, counter, src, dst, size, workers, chunk)
+        finally:
+            dst.flush()
+            dst.close()
+            src.close()
+
+
+def ctr_mmap(w, counter, src, dst, size, workers, chunk):
+    """Xors the keystream of src into dst (which may be src) chunk by chunk"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded number of chunks in flight
+        pending = deque()
+        for offset in range(0, size, chunk):
+            nblocks = (min(chunk, size - offset) + 15) // 16
+            pending.append((offset, pool.submit(ctr_keystream, w,
+                counter + offset // 16, nblocks)))
+            while len(pending) > 2 * workers or (pending and offset + chunk >= size):
+                start, future = pending.popleft()
+                end = min(start + chunk, size)
+                dst[start:end] = xorbytes(src[start:end], future.result())
+
+
 #####################################################################
 # Main Program Stuff
 #####################################################################
@@ -316,8 +1375,8 @@ def print_usage_and_exit(exitcode):
     print('')
     print('  -h\t\t\tPrint this message')
     print('  -i b1, ...\t\tInverse')
-    print('  -a b1, ...\t\tAlog')
-    print('  -l b1, ...\t\tLog')
+    print('  -a e1, ...\t\tAlog (base 03)')
+    print('  -l b1, ...\t\tLog (base 03)')
     print('  -s b1, ...\t\tSubBytes')
     print('  -S s1, ...\t\tInvSubBytes')
     print('  -r b1...b16\t\tShiftRows')
@@ -325,6 +1384,22 @@ def print_usage_and_exit(exitcode):
     print('  -m a1 a2 a3 a4\tMixColumns')
     print('  -M c1 c2 c3 c4\tInvMixColumns')
     print('  -t\t\t\tGenerate T-Table')
+    print('  -T\t\t\tGenerate inverse T-Table')
+    print('  -e key [in [out]]\tEncrypt a file (AES-ECB, PKCS#7 padding)')
+    print('  -d key [in [out]]\tDecrypt a file (AES-ECB, PKCS#7 padding)')
+    print('  -c file\t\tLoad/store the lookup tables in a cache file')
+    print('  -n\t\t\tUse the NumPy batched backend for -e/-d')
+    print('  -b\t\t\tUse the bitsliced backend for -e/-d')
+    print('  -x key in [out]\tEncrypt/decrypt a file in CTR mode (in place without out)')
+    print('  -I iv\t\t\tInitial CTR counter block (default 0)')
+    print('  -j workers\t\tCTR worker processes (default CPU count)')
+    print('  -f [file]\t\tStream -s/-S/-r/-R/-m/-M over a file or stdin')
+    print('\t\t\t(-r/-R/-m/-M work on 16 byte blocks in FIPS-197 order)')
+    print('  -H\t\t\tRead and write hex instead of raw bytes with -f')
+    print('  -D [file]\t\tDifference distribution table of an S-box')
+    print('  -L [file]\t\tLinear approximation table of an S-box')
+    print('  -A [file]\t\tDifferential uniformity, nonlinearity and degree')
+    print('\t\t\t(file holds the S-box as hex values, default AES)')
     sys.exit(exitcode)
 
 
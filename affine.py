@@ -2,6 +2,7 @@
 
 from __future__ import print_function
 import sys, getopt
+from numtheory import modinverse
 
 def main(argv):
 
@@ -61,7 +62,7 @@ def encode(k1, k2, f):
 
 def decode(k1, k2, f):
     "Decodes the affine cipher"
-    k1_inv = get_inverse(26, k1)
+    k1_inv = modinverse(k1, 26)
     message = ''
     for line in f:
         for c in line.upper():
@@ -72,18 +73,6 @@ def decode(k1, k2, f):
     return message
 
 
-def get_inverse(a, b):
-    "Returns the inverse assuming gcd(a, b) = 1"
-    x1, x2 = 0, 1
-    q = int(a / b)
-    r1, r2 = b, a % b
-    while r2 > 0:
-        x1, x2 = x2, x1 - (q * x2)
-        q = int(r1 / r2)
-        r1, r2 = r2, r1 % r2
-    return x2 % 26 # This works for negatives in Python!
-
-
 def print_usage_and_exit(exitcode):
     print('USAGE: {} [OPTIONS] [file]'.format(sys.argv[0]))
     print('')
@@ -7,13 +7,20 @@
 #
 
 from __future__ import print_function
-import sys, getopt
+import sys, getopt, os, json, random, time, hashlib, multiprocessing
+from collections import namedtuple, OrderedDict
+from queue import Empty
+from concurrent.futures import ProcessPoolExecutor
+from numtheory import euclidean, modinverse, batch_modinverse, isqrt, legendre, modsqrt, \
+        is_probable_prime, factorize
 
 # Polynomial types
 simple = 1
 supersingular = 2
 nonsupersingular = 3
 
+verbose = False
+
 def main(argv):
 
     global verbose
@@ -24,10 +31,15 @@ def main(argv):
     beta = -1
     gamma = -1
     modulo = -1
+    width = None
+    fixedbase = None
+    order = None
+    workers = None
+    ladder = False
 
     # Parse options
     try:
-        oplist, args = getopt.getopt(argv, 'hva:b:c:p:123')
+        oplist, args = getopt.getopt(argv, 'hva:b:c:p:w:P:n:j:l123')
     except getopt.GetoptError as err:
         print(err, file=sys.stderr)
 
@@ -37,13 +49,23 @@ def main(argv):
         elif o == '-v':
             verbose = True
         elif o == '-a':
-            alpha = int(a)
+            alpha = int(a, 0)
         elif o == '-b':
-            beta = int(a)
+            beta = int(a, 0)
         elif o == '-c':
-            gamma = int(a)
+            gamma = int(a, 0)
         elif o == '-p':
-            modulo = int(a)
+            modulo = int(a, 0)
+        elif o == '-w':
+            width = int(a)
+        elif o == '-P':
+            fixedbase = a
+        elif o == '-n':
+            order = int(a, 0)
+        elif o == '-j':
+            workers = int(a)
+        elif o == '-l':
+            ladder = True
         elif o == '-1':
             polytype = simple
         elif o == '-2':
@@ -63,8 +85,8 @@ def main(argv):
     if command == "modinverse":
         if len(args) != 2:
             print_usage_and_exit(1)
-        k = int(args[0])
-        p = int(args[1])
+        k = int(args[0], 0)
+        p = int(args[1], 0)
         kinv = modinverse(k, p)
         assert k * kinv % p == 1
         print('{} * {} = 1 mod {}'.format(k, kinv, p))
@@ -78,40 +100,91 @@ def main(argv):
             sys.exit(1)
         poly = ECCSimplePoly(alpha, beta, modulo)
     elif polytype == supersingular:
-        assert False, 'Unimplemented polynomial type'
+        if alpha < 0 or beta < 0 or gamma < 0 or modulo < 0:
+            print('ERROR: Expected polynomial coefficients/modulo', file=sys.stderr)
+            sys.exit(1)
+        poly = ECCSupersingularPoly(alpha, beta, gamma, modulo)
     elif polytype == nonsupersingular:
-        assert False, 'Unimplemented polynomial type'
+        if alpha < 0 or beta < 0 or modulo < 0:
+            print('ERROR: Expected polynomial coefficients/modulo', file=sys.stderr)
+            sys.exit(1)
+        poly = ECCNonSupersingularPoly(alpha, beta, modulo)
     else:
         assert False, 'Invalid polynomial type'
+    if order is not None:
+        poly.set_group_order(order)
+    if ladder and not isinstance(poly, ECCSimplePoly):
+        print('ERROR: The Montgomery ladder needs a simple polynomial', file=sys.stderr)
+        sys.exit(1)
 
     # List group
     if command == "listgroup":
         if len(args) != 2:
             print_usage_and_exit(1)
-        x = int(args[0])
-        y = int(args[1])
-        elements = poly.calc_elements((x, y))
-        for i in range(len(elements)):
-            print('{:3d}: ({:3d}; {:3d})'.format(i + 1, elements[i][0], elements[i][1]))
+        x = int(args[0], 0)
+        y = int(args[1], 0)
+        for i, element in enumerate(poly.iter_elements((x, y))):
+            print('{:3d}: ({:3d}; {:3d})'.format(i + 1, element[0], element[1]))
 
     # Scalar multiplication
     elif command == "multiply":
         if len(args) != 3:
             print_usage_and_exit(1)
-        x = int(args[0])
-        y = int(args[1])
-        scalar = int(args[2])
-        ret_x, ret_y = poly.eccmul((x, y), scalar)
+        x = int(args[0], 0)
+        y = int(args[1], 0)
+        scalar = int(args[2], 0)
+        if fixedbase is not None:
+            if os.path.exists(fixedbase):
+                table = poly.load_fixedbase(fixedbase)
+                if table.base != (x, y):
+                    print('ERROR: {} holds a different base point'.format(fixedbase), file=sys.stderr)
+                    sys.exit(1)
+            else:
+                table = poly.precompute((x, y), width or FIXEDBASE_WIDTH)
+                table.save(fixedbase)
+            ret_x, ret_y = poly.fixedmul((x, y), scalar, table.width)
+        elif ladder:
+            ret_x, ret_y = poly.ladder((x, y), scalar)
+        else:
+            ret_x, ret_y = poly.eccmul((x, y), scalar, width)
         print('{} * ({}; {}) = ({}; {})'.format(scalar, x, y, ret_x, ret_y))
 
+    # Batch scalar multiplication
+    elif command == "batchmultiply":
+        if len(args) > 1:
+            print_usage_and_exit(1)
+        fin = open(args[0], 'r') if len(args) == 1 else sys.stdin
+        try:
+            for x, y, scalar, ret_x, ret_y in batch_multiply(poly, fin, width, ladder, workers):
+                print('{} * ({}; {}) = ({}; {})'.format(scalar, x, y, ret_x, ret_y))
+        except ValueError as err:
+            print('ERROR: {}'.format(err), file=sys.stderr)
+            sys.exit(1)
+        finally:
+            if fin is not sys.stdin:
+                fin.close()
+
+    # Multi-scalar multiplication
+    elif command == "multimul":
+        if len(args) == 0 or len(args) % 3 != 0:
+            print_usage_and_exit(1)
+        points = []
+        scalars = []
+        for i in range(0, len(args), 3):
+            points.append((int(args[i], 0), int(args[i + 1], 0)))
+            scalars.append(int(args[i + 2], 0))
+        ret_x, ret_y = poly.multi_mul(points, scalars, width)
+        print('{} = ({}; {})'.format(' + '.join(['{} * ({}; {})'.format(s, x, y)
+            for (x, y), s in zip(points, scalars)]), ret_x, ret_y))
+
     # Add points
     elif command == "add":
         if len(args) != 4:
             print_usage_and_exit(1)
-        x1 = int(args[0])
-        y1 = int(args[1])
-        x2 = int(args[2])
-        y2 = int(args[3])
+        x1 = int(args[0], 0)
+        y1 = int(args[1], 0)
+        x2 = int(args[2], 0)
+        y2 = int(args[3], 0)
         ret_x, ret_y = poly.eccadd((x1, y1), (x2, y2))
         print('({}; {}) + ({}; {}) = ({}; {})'.format(x1, y1, x2, y2, ret_x, ret_y))
 
@@ -119,14 +192,112 @@ def main(argv):
     elif command == "polyinverse":
         if len(args) != 3:
             print_usage_and_exit(1)
-        x = int(args[0])
-        y = int(args[1])
-        k = int(args[2])
-        elements = poly.calc_elements((x, y))
-        kinv = modinverse(k, len(elements))
-        assert poly.eccmul((x, y), k * kinv) == (x, y)
+        x = int(args[0], 0)
+        y = int(args[1], 0)
+        k = int(args[2], 0)
+        kinv = modinverse(k, poly.point_order((x, y)))
+        assert poly.eccmul((x, y), k * kinv, width) == (x, y)
         print('{} * {} * ({}; {}) = ({}, {})'.format(k, kinv, x, y, x, y))
 
+    # ECDSA
+    elif command == "keygen":
+        if len(args) != 2:
+            print_usage_and_exit(1)
+        g = (int(args[0], 0), int(args[1], 0))
+        d, q = ecdsa_keygen(poly, g, poly.point_order(g))
+        print('d = {}'.format(d))
+        print('Q = ({}; {})'.format(q[0], q[1]))
+        print('pubkey = {}'.format(poly.encode_point(q).hex()))
+
+    elif command == "sign":
+        if len(args) != 4:
+            print_usage_and_exit(1)
+        g = (int(args[0], 0), int(args[1], 0))
+        d = int(args[2], 0)
+        r, s = ecdsa_sign(poly, g, poly.point_order(g), d, args[3].encode())
+        print('r = {}'.format(r))
+        print('s = {}'.format(s))
+
+    elif command == "verify":
+        if len(args) != 7:
+            print_usage_and_exit(1)
+        g = (int(args[0], 0), int(args[1], 0))
+        q = (int(args[2], 0), int(args[3], 0))
+        signature = (int(args[4], 0), int(args[5], 0))
+        if poly.is_on_curve(q) and ecdsa_verify(poly, g, poly.point_order(g), q, args[6].encode(), signature):
+            print('Valid signature')
+        else:
+            print('Invalid signature')
+            sys.exit(1)
+
+    elif command == "batchverify":
+        if len(args) != 2 and len(args) != 3:
+            print_usage_and_exit(1)
+        g = (int(args[0], 0), int(args[1], 0))
+        n = poly.point_order(g)
+        fin = open(args[2], 'r') if len(args) == 3 else sys.stdin
+        count = valid = 0
+        start = time.time()
+        try:
+            for i, ok in enumerate(batch_verify(poly, g, n, fin, workers), 1):
+                print('{}: {}'.format(i, 'valid' if ok else 'invalid'))
+                count += 1
+                valid += ok
+        except ValueError as err:
+            print('ERROR: {}'.format(err), file=sys.stderr)
+            sys.exit(1)
+        finally:
+            if fin is not sys.stdin:
+                fin.close()
+        elapsed = time.time() - start
+        print('{} signatures, {} valid, {:.2f}s ({:.0f} verifications/s)'.format(
+            count, valid, elapsed, count / elapsed if elapsed > 0 else 0), file=sys.stderr)
+        if valid != count:
+            sys.exit(1)
+
+    # SEC1 point encoding
+    elif command == "encode":
+        if len(args) != 2:
+            print_usage_and_exit(1)
+        x = int(args[0], 0)
+        y = int(args[1], 0)
+        if not poly.is_on_curve((x, y)):
+            print('ERROR: ({}; {}) is not on the polynomial'.format(x, y), file=sys.stderr)
+            sys.exit(1)
+        print('compressed:   {}'.format(poly.encode_point((x, y)).hex()))
+        print('uncompressed: {}'.format(poly.encode_point((x, y), False).hex()))
+
+    elif command == "decode":
+        if len(args) != 1:
+            print_usage_and_exit(1)
+        x, y = poly.decode_point(bytes.fromhex(args[0]))
+        print('{} = ({}; {})'.format(args[0], x, y))
+
+    # Group/point order
+    elif command == "order":
+        if len(args) != 0 and len(args) != 2:
+            print_usage_and_exit(1)
+        n = poly.group_order()
+        if n is not None:
+            print('#E = {}'.format(n))
+        elif len(args) == 0:
+            assert False, 'Group order is not available for this polynomial, set it with -n'
+        if len(args) == 2:
+            x = int(args[0], 0)
+            y = int(args[1], 0)
+            print('ord({}; {}) = {}'.format(x, y, poly.point_order((x, y))))
+
+    # Discrete logarithm
+    elif command == "dlog":
+        if len(args) != 4:
+            print_usage_and_exit(1)
+        x1 = int(args[0], 0)
+        y1 = int(args[1], 0)
+        x2 = int(args[2], 0)
+        y2 = int(args[3], 0)
+        k = poly.dlog((x1, y1), (x2, y2), workers)
+        print('{} * ({}; {}) = ({}; {})'.format(k, x1, y1, x2, y2))
+
     # Else error
     else:
         print('ERROR: Invalid command `{}`'.format(command), file=sys.stderr)
@@ -136,43 +307,147 @@ def main(argv):
 # Helping functions
 #####################################################################
 
-def log(message):
+def log(message, *args):
+    """Prints message.format(*args) when verbose; formatting is skipped otherwise"""
     if verbose:
-        print(message)
-
-def euclidean(a, b):
-    """Returns (gcd, x, y) where a * x + b * y = gcd"""
-    x2, x1 = 0, 1
-    y2, y1 = 1, 0
-    r2, r1 = b, a
-    while r2 != 0:
-        q = r1 / r2
-        r1, r2 = r2, r1 - (q * r2)
-        x1, x2 = x2, x1 - (q * x2)
-        y1, y2 = y2, y1 - (q * y2)
-    return r1, x1, y1
-
-def modinverse(n, p):
-    """Returns ninv where n * ninv = 1 mod p"""
-    gcd, x, y = euclidean(n, p)
-    assert (n * x + p * y) % p == gcd
-    assert gcd == 1, 'No modular multiplicative inverse exists'
-    return x % p
+        print(message.format(*args))
+
+def gf2_terms(modulus):
+    """Returns (m, [k...]) for the polynomial x^m + sum(x^k), cached"""
+    terms = _gf2_terms.get(modulus)
+    if terms is None:
+        m = modulus.bit_length() - 1
+        terms = (m, [k for k in range(m) if (modulus >> k) & 1])
+        _gf2_terms[modulus] = terms
+    return terms
+
+_gf2_terms = {}
+
+def gf2_reduce(c, modulus):
+    """Returns c mod modulus, folding x^m = sum(x^k) word-wise
+
+    Trinomials and pentanomials take two or three folds per reduction.
+    """
+    m, ks = gf2_terms(modulus)
+    mask = (1 << m) - 1
+    while c >> m:
+        hi = c >> m
+        c &= mask
+        for k in ks:
+            c ^= hi << k
+    return c
+
+def gf2_mul(a, b, modulus):
+    """Returns a * b in GF(2^m) with a 4-bit windowed carry-less multiply"""
+    if a.bit_length() < b.bit_length():
+        a, b = b, a
+    table = [0, a]
+    for i in range(2, 16):
+        table.append(table[i >> 1] << 1 if i % 2 == 0 else table[i - 1] ^ a)
+    c = 0
+    shift = 0
+    while b:
+        c ^= table[b & 15] << shift
+        b >>= 4
+        shift += 4
+    return gf2_reduce(c, modulus)
+
+# Squaring interleaves zero bits: 8 bits in, 16 bits out
+_gf2_spread = [int(''.join([c + '0' for c in '{:08b}'.format(i)])[:-1], 2) for i in range(256)]
+
+def gf2_sqr(a, modulus):
+    """Returns a^2 in GF(2^m)"""
+    c = 0
+    shift = 0
+    while a:
+        c |= _gf2_spread[a & 255] << shift
+        a >>= 8
+        shift += 16
+    return gf2_reduce(c, modulus)
+
+def gf2_inverse(a, modulus):
+    """Returns ainv where a * ainv = 1 in GF(2^m) (binary extended Euclid)"""
+    if a == 0:
+        assert False, 'No multiplicative inverse exists'
+    u, v = a, modulus
+    g1, g2 = 1, 0
+    while u != 1:
+        j = u.bit_length() - v.bit_length()
+        if j < 0:
+            u, v = v, u
+            g1, g2 = g2, g1
+            j = -j
+        u ^= v << j
+        g1 ^= g2 << j
+        if u == 0:
+            # v is gcd(a, modulus) != 1
+            assert False, 'No multiplicative inverse exists gcd = {:#x}'.format(v)
+    return gf2_reduce(g1, modulus)
+
+def gf2_is_irreducible(modulus):
+    """Rabin's test: x^(2^m) = x mod f and gcd(x^(2^(m/q)) - x, f) = 1 for primes q | m"""
+    m = gf2_terms(modulus)[0]
+    if m < 1:
+        return False
+    powers = [2]
+    for i in range(m):
+        powers.append(gf2_sqr(powers[-1], modulus))
+    if powers[m] != gf2_reduce(2, modulus):
+        return False
+    for q in set(factorize(m)):
+        a, b = modulus, powers[m // q] ^ gf2_reduce(2, modulus)
+        while b != 0:
+            while a.bit_length() >= b.bit_length():
+                a ^= b << (a.bit_length() - b.bit_length())
+            a, b = b, a
+        if a != 1:
+            return False
+    return True
+
+def gf2_trace(a, modulus):
+    """Returns Tr(a) = a + a^2 + ... + a^(2^(m-1)), either 0 or 1"""
+    m = gf2_terms(modulus)[0]
+    t = a
+    for i in range(m - 1):
+        a = gf2_sqr(a, modulus)
+        t ^= a
+    return t
+
+def gf2_solve_quadratic(beta, modulus, rng=random):
+    """Returns z where z^2 + z = beta in GF(2^m), or None if there is none"""
+    m = gf2_terms(modulus)[0]
+    if beta == 0:
+        return 0
+    # Solvable exactly when Tr(beta) = 0
+    if gf2_trace(beta, modulus) != 0:
+        return None
+    if m % 2 == 1:
+        # Half-trace
+        z = beta
+        for i in range((m - 1) // 2):
+            z = gf2_sqr(gf2_sqr(z, modulus), modulus) ^ beta
+    else:
+        while True:
+            tau = rng.randrange(1 << m)
+            z, w = 0, beta
+            for i in range(1, m):
+                w2 = gf2_sqr(w, modulus)
+                z = gf2_sqr(z, modulus) ^ gf2_mul(w2, tau, modulus)
+                w = w2 ^ beta
+            if gf2_sqr(z, modulus) ^ z != 0:
+                break
+    if gf2_sqr(z, modulus) ^ z != beta:
+        return None
+    return z
 
 #####################################################################
 # ECC Polynomial Classes
 #####################################################################
 
 def simple_eccdouble(poly, p):
-    if not isinstance(poly, ECCSimplePoly):
-        assert False, 'Invalid eccdouble function'
-    if not isinstance(p, (tuple, list)) or len(p) != 2:
-        assert False, 'Invalid point type'
-
-    alpha = int(poly.coefficients[0])
-    beta = int(poly.coefficients[1])
-    modulo = int(poly.modulo)
-    x, y = int(p[0]), int(p[1])
+    alpha = poly.coefficients[0]
+    modulo = poly.modulo
+    x, y = p
 
     # Special case for infinity
     if x < 0 or y < 0:
@@ -190,18 +465,9 @@ def simple_eccdouble(poly, p):
     return (ret_x, ret_y)
 
 def simple_eccadd(poly, p1, p2):
-    if not isinstance(poly, ECCSimplePoly):
-        assert False, 'Invalid eccadd function'
-    if not isinstance(p1, (tuple, list)) or len(p1) != 2:
-        assert False, 'Invalid point type'
-    if not isinstance(p2, (tuple, list)) or len(p2) != 2:
-        assert False, 'Invalid point type'
-
-    alpha = int(poly.coefficients[0])
-    beta = int(poly.coefficients[1])
-    modulo = int(poly.modulo)
-    x1, y1 = int(p1[0]), int(p1[1])
-    x2, y2 = int(p2[0]), int(p2[1])
+    modulo = poly.modulo
+    x1, y1 = p1
+    x2, y2 = p2
 
     # Special case for infinity
     if x1 < 0 or y1 < 0:
@@ -224,48 +490,959 @@ def simple_eccadd(poly, p1, p2):
 
     return (ret_x, ret_y)
 
+def simple_eccbatchadd(poly, points, others):
+    """Returns [p + q for p, q in zip(points, others)] sharing one inversion"""
+    modulo = poly.modulo
+    ret = list(points)
+    regular = []
+    for i, ((x1, y1), q) in enumerate(zip(points, others)):
+        x2, y2 = q
+        if x1 < 0 or y1 < 0:
+            ret[i] = q
+        elif x2 < 0 or y2 < 0:
+            pass
+        elif x1 == x2:
+            ret[i] = simple_eccdouble(poly, q) if y1 == y2 else (-1, -1)
+        else:
+            regular.append(i)
+    inverses = batch_modinverse([(others[i][0] - points[i][0]) % modulo for i in regular], modulo)
+    for i, inv in zip(regular, inverses):
+        x1, y1 = points[i]
+        x2, y2 = others[i]
+        slope = ((y2 - y1) * inv) % modulo
+        ret_x = (slope * slope - x1 - x2) % modulo
+        ret[i] = (ret_x, (slope * (x1 - ret_x) - y1) % modulo)
+    return ret
+
+def simple_eccneg(poly, p):
+    x, y = p
+    if x < 0 or y < 0:
+        return p
+    return (x, (-y) % poly.modulo)
+
+def simple_tojacobian(poly, p):
+    """Returns the affine point p in Jacobian coordinates (X, Y, Z)"""
+    x, y = p
+    if x < 0 or y < 0:
+        return (1, 1, 0)
+    return (x, y, 1)
+
+def simple_fromjacobian(poly, P):
+    """Returns the affine point (X / Z^2, Y / Z^3), one inversion"""
+    X, Y, Z = P
+    if Z == 0:
+        return (-1, -1)
+    modulo = poly.modulo
+    zinv = modinverse(Z, modulo)
+    zinv2 = (zinv * zinv) % modulo
+    return ((X * zinv2) % modulo, (Y * zinv2 * zinv) % modulo)
+
+def simple_jacobian_double(poly, P):
+    X, Y, Z = P
+    if Z == 0 or Y == 0:
+        return (1, 1, 0)
+    modulo = poly.modulo
+    alpha = poly.coefficients[0]
+    XX = (X * X) % modulo
+    YY = (Y * Y) % modulo
+    ZZ = (Z * Z) % modulo
+    S = (4 * X * YY) % modulo
+    M = (3 * XX + alpha * ZZ * ZZ) % modulo
+    ret_x = (M * M - 2 * S) % modulo
+    ret_y = (M * (S - ret_x) - 8 * YY * YY) % modulo
+    ret_z = (2 * Y * Z) % modulo
+    return (ret_x, ret_y, ret_z)
+
+def simple_jacobian_add(poly, P1, P2):
+    X1, Y1, Z1 = P1
+    X2, Y2, Z2 = P2
+    if Z1 == 0:
+        return P2
+    if Z2 == 0:
+        return P1
+    modulo = poly.modulo
+    Z1Z1 = (Z1 * Z1) % modulo
+    Z2Z2 = (Z2 * Z2) % modulo
+    U1 = (X1 * Z2Z2) % modulo
+    U2 = (X2 * Z1Z1) % modulo
+    S1 = (Y1 * Z2 * Z2Z2) % modulo
+    S2 = (Y2 * Z1 * Z1Z1) % modulo
+    H = (U2 - U1) % modulo
+    r = (S2 - S1) % modulo
+    if H == 0:
+        if r == 0:
+            return simple_jacobian_double(poly, P1)
+        return (1, 1, 0)
+    HH = (H * H) % modulo
+    HHH = (H * HH) % modulo
+    V = (U1 * HH) % modulo
+    ret_x = (r * r - HHH - 2 * V) % modulo
+    ret_y = (r * (V - ret_x) - S1 * HHH) % modulo
+    ret_z = (Z1 * Z2 * H) % modulo
+    return (ret_x, ret_y, ret_z)
+
+def simple_jacobian_madd(poly, P, q):
+    """Adds the affine point q to the Jacobian point P"""
+    X1, Y1, Z1 = P
+    x2, y2 = q
+    if x2 < 0 or y2 < 0:
+        return P
+    if Z1 == 0:
+        return (x2, y2, 1)
+    modulo = poly.modulo
+    Z1Z1 = (Z1 * Z1) % modulo
+    U2 = (x2 * Z1Z1) % modulo
+    S2 = (y2 * Z1 * Z1Z1) % modulo
+    H = (U2 - X1) % modulo
+    r = (S2 - Y1) % modulo
+    if H == 0:
+        if r == 0:
+            return simple_jacobian_double(poly, P)
+        return (1, 1, 0)
+    HH = (H * H) % modulo
+    HHH = (H * HH) % modulo
+    V = (X1 * HH) % modulo
+    ret_x = (r * r - HHH - 2 * V) % modulo
+    ret_y = (r * (V - ret_x) - Y1 * HHH) % modulo
+    ret_z = (Z1 * H) % modulo
+    return (ret_x, ret_y, ret_z)
+
+def simple_xz_double(poly, X, Z):
+    """Returns 2P in x-only (X : Z) coordinates"""
+    modulo = poly.modulo
+    alpha, beta = poly.coefficients
+    XX = (X * X) % modulo
+    ZZ = (Z * Z) % modulo
+    t = (XX - alpha * ZZ) % modulo
+    ret_x = (t * t - 8 * beta * X * Z * ZZ) % modulo
+    ret_z = (4 * Z * (X * XX + alpha * X * ZZ + beta * Z * ZZ)) % modulo
+    return ret_x, ret_z
+
+def simple_xz_diffadd(poly, Xm, Zm, Xn, Zn, xd):
+    """Returns Pm + Pn in (X : Z) coordinates given the affine x of Pm - Pn"""
+    modulo = poly.modulo
+    alpha, beta = poly.coefficients
+    XmZn = Xm * Zn
+    XnZm = Xn * Zm
+    ZmZn = (Zm * Zn) % modulo
+    d = (XmZn - XnZm) % modulo
+    dd = (d * d) % modulo
+    ret_x = (2 * (XmZn + XnZm) * (Xm * Xn + alpha * ZmZn)
+            + 4 * beta * ZmZn * ZmZn - xd * dd) % modulo
+    return ret_x, dd
+
+def supersingular_eccdouble(poly, p):
+    """y^2 + cy = x^3 + bx + a: lambda = (x^2 + b) / c, never infinity"""
+    x, y = p
+    if x < 0 or y < 0:
+        return p
+    modulo = poly.modulo
+    beta, alpha, gamma = poly.coefficients
+    slope = gf2_mul(gf2_sqr(x, modulo) ^ beta, poly.gammainv, modulo)
+    ret_x = gf2_sqr(slope, modulo)
+    ret_y = gf2_mul(slope, x ^ ret_x, modulo) ^ y ^ gamma
+    return (ret_x, ret_y)
+
+def supersingular_eccadd(poly, p1, p2):
+    x1, y1 = p1
+    x2, y2 = p2
+    if x1 < 0 or y1 < 0:
+        return p2
+    if x2 < 0 or y2 < 0:
+        return p1
+    modulo = poly.modulo
+    gamma = poly.coefficients[2]
+    if x1 == x2:
+        if y1 == y2:
+            return supersingular_eccdouble(poly, p1)
+        return (-1, -1)
+    slope = gf2_mul(y1 ^ y2, gf2_inverse(x1 ^ x2, modulo), modulo)
+    ret_x = gf2_sqr(slope, modulo) ^ x1 ^ x2
+    ret_y = gf2_mul(slope, x1 ^ ret_x, modulo) ^ y1 ^ gamma
+    return (ret_x, ret_y)
+
+def supersingular_eccneg(poly, p):
+    x, y = p
+    if x < 0 or y < 0:
+        return p
+    return (x, y ^ poly.coefficients[2])
+
+def supersingular_toproj(poly, p):
+    """Returns the affine point p in homogeneous coordinates (X, Y, Z)"""
+    x, y = p
+    if x < 0 or y < 0:
+        return (0, 1, 0)
+    return (x, y, 1)
+
+def supersingular_fromproj(poly, P):
+    X, Y, Z = P
+    if Z == 0:
+        return (-1, -1)
+    modulo = poly.modulo
+    zinv = gf2_inverse(Z, modulo)
+    return (gf2_mul(X, zinv, modulo), gf2_mul(Y, zinv, modulo))
+
+def supersingular_proj_double(poly, P):
+    X, Y, Z = P
+    if Z == 0:
+        return P
+    modulo = poly.modulo
+    beta, alpha, gamma = poly.coefficients
+    ZZ = gf2_sqr(Z, modulo)
+    Z4 = gf2_sqr(ZZ, modulo)
+    # lambda = N / Z^2
+    N = gf2_mul(gf2_sqr(X, modulo) ^ gf2_mul(beta, ZZ, modulo), poly.gammainv, modulo)
+    NN = gf2_sqr(N, modulo)
+    ret_x = gf2_mul(NN, ZZ, modulo)
+    ret_y = (gf2_mul(N, gf2_mul(X, gf2_mul(ZZ, Z, modulo), modulo) ^ NN, modulo)
+            ^ gf2_mul(Y, gf2_mul(Z4, Z, modulo), modulo)
+            ^ gf2_mul(gamma, gf2_mul(Z4, ZZ, modulo), modulo))
+    ret_z = gf2_mul(Z4, ZZ, modulo)
+    return (ret_x, ret_y, ret_z)
+
+def supersingular_proj_add(poly, P1, P2):
+    X1, Y1, Z1 = P1
+    X2, Y2, Z2 = P2
+    if Z1 == 0:
+        return P2
+    if Z2 == 0:
+        return P1
+    modulo = poly.modulo
+    gamma = poly.coefficients[2]
+    # lambda = A / B
+    A = gf2_mul(Y1, Z2, modulo) ^ gf2_mul(Y2, Z1, modulo)
+    B = gf2_mul(X1, Z2, modulo) ^ gf2_mul(X2, Z1, modulo)
+    if B == 0:
+        if A == 0:
+            return supersingular_proj_double(poly, P1)
+        return (0, 1, 0)
+    D = gf2_mul(Z1, Z2, modulo)
+    BB = gf2_sqr(B, modulo)
+    BBB = gf2_mul(BB, B, modulo)
+    E = gf2_mul(gf2_sqr(A, modulo), D, modulo) ^ BBB
+    ret_x = gf2_mul(B, E, modulo)
+    ret_z = gf2_mul(BBB, D, modulo)
+    ret_y = (gf2_mul(A, gf2_mul(X1, gf2_mul(BB, Z2, modulo), modulo) ^ E, modulo)
+            ^ gf2_mul(Y1, gf2_mul(BBB, Z2, modulo), modulo)
+            ^ gf2_mul(gamma, ret_z, modulo))
+    return (ret_x, ret_y, ret_z)
+
+def supersingular_proj_madd(poly, P, q):
+    return supersingular_proj_add(poly, P, supersingular_toproj(poly, q))
+
+def nonsupersingular_eccdouble(poly, p):
+    """y^2 + xy = x^3 + bx^2 + a: lambda = x + y / x, infinity when x = 0"""
+    x, y = p
+    if x < 0 or y < 0:
+        return p
+    if x == 0:
+        return (-1, -1)
+    modulo = poly.modulo
+    beta = poly.coefficients[0]
+    slope = x ^ gf2_mul(y, gf2_inverse(x, modulo), modulo)
+    ret_x = gf2_sqr(slope, modulo) ^ slope ^ beta
+    ret_y = gf2_sqr(x, modulo) ^ gf2_mul(slope ^ 1, ret_x, modulo)
+    return (ret_x, ret_y)
+
+def nonsupersingular_eccadd(poly, p1, p2):
+    x1, y1 = p1
+    x2, y2 = p2
+    if x1 < 0 or y1 < 0:
+        return p2
+    if x2 < 0 or y2 < 0:
+        return p1
+    if x1 == x2:
+        if y1 == y2:
+            return nonsupersingular_eccdouble(poly, p1)
+        return (-1, -1)
+    modulo = poly.modulo
+    beta = poly.coefficients[0]
+    slope = gf2_mul(y1 ^ y2, gf2_inverse(x1 ^ x2, modulo), modulo)
+    ret_x = gf2_sqr(slope, modulo) ^ slope ^ x1 ^ x2 ^ beta
+    ret_y = gf2_mul(slope, x1 ^ ret_x, modulo) ^ ret_x ^ y1
+    return (ret_x, ret_y)
+
+def nonsupersingular_eccneg(poly, p):
+    x, y = p
+    if x < 0 or y < 0:
+        return p
+    return (x, x ^ y)
+
+def nonsupersingular_tolopezdahab(poly, p):
+    """Returns the affine point p in Lopez-Dahab coordinates (X / Z, Y / Z^2)"""
+    x, y = p
+    if x < 0 or y < 0:
+        return (1, 0, 0)
+    return (x, y, 1)
+
+def nonsupersingular_fromlopezdahab(poly, P):
+    X, Y, Z = P
+    if Z == 0:
+        return (-1, -1)
+    modulo = poly.modulo
+    zinv = gf2_inverse(Z, modulo)
+    return (gf2_mul(X, zinv, modulo), gf2_mul(Y, gf2_sqr(zinv, modulo), modulo))
+
+def nonsupersingular_lopezdahab_double(poly, P):
+    X, Y, Z = P
+    if Z == 0:
+        return P
+    modulo = poly.modulo
+    beta, alpha = poly.coefficients
+    XX = gf2_sqr(X, modulo)
+    ZZ = gf2_sqr(Z, modulo)
+    aZ4 = gf2_mul(alpha, gf2_sqr(ZZ, modulo), modulo)
+    ret_z = gf2_mul(XX, ZZ, modulo)
+    ret_x = gf2_sqr(XX, modulo) ^ aZ4
+    ret_y = (gf2_mul(aZ4, ret_z, modulo)
+            ^ gf2_mul(ret_x, gf2_mul(beta, ret_z, modulo) ^ gf2_sqr(Y, modulo) ^ aZ4, modulo))
+    return (ret_x, ret_y, ret_z)
+
+def nonsupersingular_lopezdahab_add(poly, P1, P2):
+    X1, Y1, Z1 = P1
+    X2, Y2, Z2 = P2
+    if Z1 == 0:
+        return P2
+    if Z2 == 0:
+        return P1
+    modulo = poly.modulo
+    beta = poly.coefficients[0]
+    Z1Z1 = gf2_sqr(Z1, modulo)
+    Z2Z2 = gf2_sqr(Z2, modulo)
+    # lambda = A / C
+    A = gf2_mul(Y1, Z2Z2, modulo) ^ gf2_mul(Y2, Z1Z1, modulo)
+    B = gf2_mul(X1, Z2, modulo) ^ gf2_mul(X2, Z1, modulo)
+    if B == 0:
+        if A == 0:
+            return nonsupersingular_lopezdahab_double(poly, P1)
+        return (1, 0, 0)
+    Z1Z2 = gf2_mul(Z1, Z2, modulo)
+    BB = gf2_sqr(B, modulo)
+    C = gf2_mul(Z1Z2, B, modulo)
+    ret_z = gf2_sqr(C, modulo)
+    ret_x = (gf2_sqr(A, modulo) ^ gf2_mul(A, C, modulo)
+            ^ gf2_mul(gf2_mul(BB, B, modulo), Z1Z2, modulo) ^ gf2_mul(beta, ret_z, modulo))
+    # y3 = (lambda + 1)(x1 + x3) + x1 + y1
+    F = gf2_mul(gf2_mul(X1, Z1, modulo), gf2_mul(Z2Z2, BB, modulo), modulo) ^ ret_x
+    G = gf2_mul(gf2_mul(X1, Z1, modulo) ^ Y1,
+            gf2_mul(Z1Z1, gf2_sqr(gf2_mul(Z2Z2, BB, modulo), modulo), modulo), modulo)
+    ret_y = gf2_mul(gf2_mul(A ^ C, F, modulo), C, modulo) ^ G
+    return (ret_x, ret_y, ret_z)
+
+def nonsupersingular_lopezdahab_madd(poly, P, q):
+    """Adds the affine point q to the Lopez-Dahab point P"""
+    X1, Y1, Z1 = P
+    x2, y2 = q
+    if x2 < 0 or y2 < 0:
+        return P
+    if Z1 == 0:
+        return (x2, y2, 1)
+    modulo = poly.modulo
+    beta = poly.coefficients[0]
+    Z1Z1 = gf2_sqr(Z1, modulo)
+    A = gf2_mul(y2, Z1Z1, modulo) ^ Y1
+    B = gf2_mul(x2, Z1, modulo) ^ X1
+    if B == 0:
+        if A == 0:
+            return nonsupersingular_lopezdahab_double(poly, P)
+        return (1, 0, 0)
+    C = gf2_mul(Z1, B, modulo)
+    D = gf2_mul(gf2_sqr(B, modulo), C ^ gf2_mul(beta, Z1Z1, modulo), modulo)
+    ret_z = gf2_sqr(C, modulo)
+    E = gf2_mul(A, C, modulo)
+    ret_x = gf2_sqr(A, modulo) ^ D ^ E
+    F = ret_x ^ gf2_mul(x2, ret_z, modulo)
+    G = gf2_mul(x2 ^ y2, gf2_sqr(ret_z, modulo), modulo)
+    ret_y = gf2_mul(E ^ ret_z, F, modulo) ^ G
+    return (ret_x, ret_y, ret_z)
+
+class ECCPoint(tuple):
+    """Affine point (x, y); a tuple, so (-1, -1) is still infinity"""
+
+    __slots__ = ()
+
+    def __new__(cls, x, y):
+        return tuple.__new__(cls, (x, y))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    @property
+    def x(self):
+        return self[0]
+
+    @property
+    def y(self):
+        return self[1]
+
+    def is_infinity(self):
+        return self[0] < 0 or self[1] < 0
+
+class ECCProjectivePoint(tuple):
+    """Projective point (X, Y, Z); Z = 0 is infinity"""
+
+    __slots__ = ()
+
+    def __new__(cls, X, Y, Z):
+        return tuple.__new__(cls, (X, Y, Z))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    @property
+    def X(self):
+        return self[0]
+
+    @property
+    def Y(self):
+        return self[1]
+
+    @property
+    def Z(self):
+        return self[2]
+
+    def is_infinity(self):
+        return self[2] == 0
+
+# Projective point arithmetic hooks: conversion to/from affine (the only
+# inversion), doubling, full addition and mixed projective + affine addition.
+# Like the affine hooks they take and return plain tuples; ECCPoly wraps the
+# points it hands back to callers in ECCPoint/ECCProjectivePoint.
+ECCProjective = namedtuple('ECCProjective', ['toproj', 'fromproj', 'double', 'add', 'madd'])
+
+def wnaf(k, width):
+    """Returns the width-w NAF digits of k >= 0, least significant first
+
+    Every non-zero digit is odd with |d| < 2^(w-1) and is followed by at
+    least w-1 zeros.
+    """
+    digits = []
+    while k > 0:
+        d = 0
+        if k & 1:
+            d = k & ((1 << width) - 1)
+            if d >= 1 << (width - 1):
+                d -= 1 << width
+            k -= d
+        digits.append(d)
+        k >>= 1
+    return digits
+
+def sliding_window(k, width):
+    """Returns sliding window digits of k >= 0 (odd, < 2^w), least significant first"""
+    digits = []
+    while k > 0:
+        if k & 1:
+            d = k & ((1 << width) - 1)
+            digits.append(d)
+            digits.extend([0] * (width - 1))
+            k >>= width
+        else:
+            digits.append(0)
+            k >>= 1
+    while len(digits) > 0 and digits[-1] == 0:
+        digits.pop()
+    return digits
+
+def default_width(k):
+    """Returns a window width suited to the bit length of k"""
+    bits = k.bit_length()
+    if bits < 24:
+        return 2
+    if bits < 80:
+        return 3
+    if bits < 240:
+        return 4
+    return 5
+
+def affine_identity(poly, p):
+    return p
+
+ELEMENTS_BATCH = 256
+RHO_STEPS = 32
+RHO_WALKS = 64
+RHO_PROGRESS = 5
+RHO_REPORT = 64
+RHO_MAX_GCD = 1 << 16
+RHO_MIN_ORDER = 1 << 16
+RHO_LIMIT = 32
+GROUP_ORDER_NAIVE = 1 << 14
+MESTRE_ATTEMPTS = 64
+FIXEDBASE_WIDTH = 4
+FIXEDBASE_CACHE_SIZE = 16
+PIPPENGER_THRESHOLD = 32
+
+class ECCFixedBase(object):
+    """Fixed-base window table: table[i][j - 1] = j * 2^(width * i) * base
+
+    Covers scalars of up to `bits` bits, which then need about bits / width
+    additions and no doublings.
+    """
+
+    def __init__(self, curve, base, width, bits, table):
+        self.curve = curve
+        self.base = base
+        self.width = width
+        self.bits = bits
+        self.table = table
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                'curve': [self.curve[0], list(self.curve[1]), self.curve[2]],
+                'base': list(self.base),
+                'width': self.width,
+                'bits': self.bits,
+                'table': [[list(q) for q in row] for row in self.table],
+            }, f, separators=(',', ':'))
+
+    @staticmethod
+    def load(path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        name, coefficients, modulo = data['curve']
+        return ECCFixedBase(
+                (name, tuple(coefficients), modulo),
+                tuple(data['base']),
+                data['width'],
+                data['bits'],
+                [[tuple(q) for q in row] for row in data['table']])
+
+_fixedbase_cache = OrderedDict()
+_order_cache = {}
+_glv_cache = {}
+
 class ECCPoly(object):
     """ECC Polynomial Structure"""
 
-    def __init__(self, coefficients, modulo, eccdouble, eccadd):
+    def __init__(self, coefficients, modulo, eccdouble, eccadd, projective=None,
+            eccneg=None, eccbatchadd=None):
         self.coefficients = coefficients
         self.modulo = modulo
         self.__eccdouble = eccdouble
         self.__eccadd = eccadd
+        self.__eccneg = eccneg
+        self.__eccbatchadd = eccbatchadd
+        # Without projective hooks the "projective" representation is affine
+        if projective is None:
+            projective = ECCProjective(affine_identity, affine_identity,
+                    eccdouble, eccadd, eccadd)
+        self.__projective = projective
 
-    def eccmul(self, p, s):
+    def eccmul(self, p, s, width=None):
+        """Returns s * p using w-NAF (or sliding window without eccneg)"""
         if not isinstance(p, (tuple, list)) or len(p) != 2:
             assert False, 'Invalid point'
         if not isinstance(s, int):
             assert False, 'Invalid scalar data type'
-        ret = (-1, -1)
-        scalar = [x for x in list('{0:0b}'.format(s))]
-        while len(scalar) > 0:
-            log('{}: {}'.format(scalar[0], ''.join(scalar)))
-            bit = int(scalar.pop(0))
-            ret = self.__eccdouble(self, ret)
-            log('Double: ({:3d}; {:3d})'.format(*ret))
-            if bit == 1:
-                ret = self.__eccadd(self, ret, p)
-                log(' - Add: ({:3d}; {:3d})'.format(*ret))
-            log('')
+        return self.fromproj(self.__wnafmul(p, s, width))
+
+    def __wnafmul(self, p, s, width):
+        """Returns s * p in projective coordinates"""
+        if s < 0:
+            p, s = self.eccneg(p), -s
+        if width is None:
+            width = default_width(s)
+        if width < 2:
+            assert False, 'Invalid window width'
+        if self.__eccneg is not None:
+            digits = wnaf(s, width)
+        else:
+            digits = sliding_window(s, width)
+        table = self.odd_multiples(p, max([abs(d) for d in digits] + [1]))
+        negtable = None
+        if self.__eccneg is not None:
+            negtable = [self.eccneg(q) for q in table]
+
+        proj = self.__projective
+        ret = proj.toproj(self, (-1, -1))
+        for i in range(len(digits) - 1, -1, -1):
+            d = digits[i]
+            ret = proj.double(self, ret)
+            log('{}: Double: {}', i, ret)
+            if d > 0:
+                ret = proj.madd(self, ret, table[d >> 1])
+                log('{}: - Add {}P: {}', i, d, ret)
+            elif d < 0:
+                ret = proj.madd(self, ret, negtable[(-d) >> 1])
+                log('{}: - Sub {}P: {}', i, -d, ret)
+        return ret
+
+    def multi_mul(self, points, scalars, width=None):
+        """Returns the sum of s * p over the points and scalars
+
+        All terms share one chain of doublings: up to PIPPENGER_THRESHOLD
+        terms are interleaved w-NAF (Straus/Shamir), more use Pippenger's
+        bucket method.
+        """
+        if len(points) != len(scalars):
+            assert False, 'Expected one scalar per point'
+        terms = []
+        for p, s in zip(points, scalars):
+            if not isinstance(s, int):
+                assert False, 'Invalid scalar data type'
+            p = tuple(p)
+            if s < 0:
+                p, s = self.eccneg(p), -s
+            if s != 0 and p[0] >= 0 and p[1] >= 0:
+                terms.append((p, s))
+        if len(terms) == 0:
+            return ECCPoint(-1, -1)
+        if len(terms) > PIPPENGER_THRESHOLD:
+            return self.__pippenger(terms)
+        return self.__straus(terms, width)
+
+    def __straus(self, terms, width):
+        digits = []
+        tables = []
+        for p, s in terms:
+            w = width or default_width(s)
+            if w < 2:
+                assert False, 'Invalid window width'
+            if self.__eccneg is not None:
+                d = wnaf(s, w)
+            else:
+                d = sliding_window(s, w)
+            table = self.odd_multiples(p, max([abs(x) for x in d] + [1]))
+            negtable = None
+            if self.__eccneg is not None:
+                negtable = [self.eccneg(q) for q in table]
+            digits.append(d)
+            tables.append((table, negtable))
+
+        proj = self.__projective
+        ret = proj.toproj(self, (-1, -1))
+        for i in range(max([len(d) for d in digits]) - 1, -1, -1):
+            ret = proj.double(self, ret)
+            for d, (table, negtable) in zip(digits, tables):
+                if i >= len(d) or d[i] == 0:
+                    continue
+                if d[i] > 0:
+                    ret = proj.madd(self, ret, table[d[i] >> 1])
+                else:
+                    ret = proj.madd(self, ret, negtable[(-d[i]) >> 1])
+            log('{}: {}', i, ret)
+        return self.fromproj(ret)
+
+    def __pippenger(self, terms):
+        proj = self.__projective
+        infinity = proj.toproj(self, (-1, -1))
+        c = max(2, len(terms).bit_length() - 2)
+        mask = (1 << c) - 1
+        bits = max([s.bit_length() for p, s in terms])
+        ret = infinity
+        for shift in range(((bits - 1) // c) * c, -1, -c):
+            for i in range(c):
+                ret = proj.double(self, ret)
+            buckets = [infinity] * (mask + 1)
+            for p, s in terms:
+                d = (s >> shift) & mask
+                if d != 0:
+                    buckets[d] = proj.madd(self, buckets[d], p)
+            # sum(j * buckets[j]) with running sums: 2 * 2^c additions
+            running = total = infinity
+            for j in range(mask, 0, -1):
+                running = proj.add(self, running, buckets[j])
+                total = proj.add(self, total, running)
+            ret = proj.add(self, ret, total)
+            log('{}: {}', shift, ret)
+        return self.fromproj(ret)
+
+    def odd_multiples(self, p, m):
+        """Returns the affine points [P, 3P, 5P, ..., mP] for odd m"""
+        table = [ECCPoint(*p)]
+        if m > 1:
+            p2 = self.eccdouble(p)
+            for i in range(3, m + 1, 2):
+                table.append(self.eccadd(table[-1], p2))
+        return table
+
+    def curve(self):
+        """Returns a hashable identifier of the polynomial"""
+        return (type(self).__name__, tuple(self.coefficients), self.modulo)
+
+    def precompute(self, base, width=FIXEDBASE_WIDTH):
+        """Returns the fixed-base table for base, built once and kept in an LRU cache"""
+        base = tuple(base)
+        key = (self.curve(), base, width)
+        table = _fixedbase_cache.get(key)
+        if table is not None:
+            _fixedbase_cache.move_to_end(key)
+            return table
+        # n <= p + 1 + 2 sqrt(p) so scalars reduced by the order fit in bits
+        bits = self.modulo.bit_length() + 1
+        rows = []
+        q = base
+        for i in range(0, bits, width):
+            row = [q]
+            for j in range(2, 1 << width):
+                row.append(self.eccadd(row[-1], q))
+            rows.append(row)
+            q = self.eccadd(row[-1], q)
+        table = ECCFixedBase(self.curve(), base, width, bits, rows)
+        self.__cache_fixedbase(key, table)
+        return table
+
+    def load_fixedbase(self, path):
+        """Loads a saved fixed-base table into the LRU cache"""
+        table = ECCFixedBase.load(path)
+        if table.curve != self.curve():
+            assert False, 'Fixed-base table is for a different polynomial'
+        self.__cache_fixedbase((table.curve, table.base, table.width), table)
+        return table
+
+    def __cache_fixedbase(self, key, table):
+        _fixedbase_cache[key] = table
+        while len(_fixedbase_cache) > FIXEDBASE_CACHE_SIZE:
+            _fixedbase_cache.popitem(last=False)
+
+    def fixedmul(self, p, s, width=FIXEDBASE_WIDTH):
+        """Returns s * p using the precomputed fixed-base table for p"""
+        if not isinstance(s, int):
+            assert False, 'Invalid scalar data type'
+        table = self.precompute(p, width)
+        if abs(s).bit_length() > table.bits:
+            return self.eccmul(p, s)
+        proj = self.__projective
+        ret = self.__fixedadd(proj.toproj(self, (-1, -1)), table, abs(s))
+        ret = self.fromproj(ret)
+        return self.eccneg(ret) if s < 0 else ret
+
+    def fixedmul_add(self, base, s, p, t, width=FIXEDBASE_WIDTH):
+        """Returns s * base + t * p
+
+        The fixed-base table for base needs no doublings, so its additions go
+        straight into the projective w-NAF sum for t * p: one inversion and
+        one doubling chain for both terms.
+        """
+        if not isinstance(s, int) or not isinstance(t, int):
+            assert False, 'Invalid scalar data type'
+        table = self.precompute(base, width)
+        if abs(s).bit_length() > table.bits:
+            return self.multi_mul([base, p], [s, t])
+        # s * base + t * p = -(|s| * base - t * p) for negative s
+        negate = s < 0
+        if negate:
+            s, t = -s, -t
+        ret = self.__fixedadd(self.__wnafmul(p, t, None), table, s)
+        ret = self.fromproj(ret)
+        return self.eccneg(ret) if negate else ret
+
+    def __fixedadd(self, ret, table, k):
+        """Returns ret + k * table.base for projective ret and k >= 0"""
+        proj = self.__projective
+        width = table.width
+        mask = (1 << width) - 1
+        i = 0
+        while k > 0:
+            d = k & mask
+            if d != 0:
+                ret = proj.madd(self, ret, table.table[i][d - 1])
+                log('{}: - Add {} * 2^{} P: {}', i, d, width * i, ret)
+            k >>= width
+            i += 1
         return ret
 
+    def toproj(self, p):
+        """Returns the affine point p in the projective coordinates of the hooks"""
+        P = self.__projective.toproj(self, p)
+        # Without projective hooks the representation stays affine
+        return ECCProjectivePoint(*P) if len(P) == 3 else ECCPoint(*P)
+
+    def fromproj(self, P):
+        """Returns the projective point P in affine coordinates"""
+        return ECCPoint(*self.__projective.fromproj(self, P))
+
+    def eccneg(self, p):
+        if self.__eccneg is None:
+            assert False, 'Point negation is not available for this polynomial'
+        return ECCPoint(*self.__eccneg(self, p))
+
     def eccadd(self, p1, p2):
-        return self.__eccadd(self, p1, p2)
+        return ECCPoint(*self.__eccadd(self, p1, p2))
 
     def eccdouble(self, p):
-        return self.__eccdouble(self, p)
+        return ECCPoint(*self.__eccdouble(self, p))
 
-    def calc_elements(self, p):
-        elements = list()
-        ret_x, ret_y = -1, -1
+    def eccbatchadd(self, points, q):
+        """Returns [p + q for p in points], sharing inversions when supported"""
+        return self.eccpairadd(points, [q] * len(points))
+
+    def eccpairadd(self, points, others):
+        """Returns [p + q for p, q in zip(points, others)], sharing inversions"""
+        if self.__eccbatchadd is not None:
+            return [ECCPoint(*r) for r in self.__eccbatchadd(self, points, others)]
+        return [ECCPoint(*self.__eccadd(self, p, q)) for p, q in zip(points, others)]
+
+    def iter_elements(self, p, batch=ELEMENTS_BATCH):
+        """Yields P, 2P, 3P, ... up to and including the point at infinity
+
+        Runs `batch` strided walks (j + t * batch) P at once so every step
+        costs one shared inversion instead of one per point.
+        """
+        current = [ECCPoint(*p)]
+        while len(current) < batch and current[-1] != (-1, -1):
+            current.append(self.eccadd(current[-1], p))
+        step = current[-1]
         while True:
-            ret_x, ret_y = self.__eccadd((ret_x, ret_y), p)
-            elements.append((ret_x, ret_y))
-            if ret_x < 0 or ret_y < 0:
-                break
-        return elements
+            for q in current:
+                yield q
+                if q[0] < 0 or q[1] < 0:
+                    return
+            current = self.eccbatchadd(current, step)
+
+    def element_order(self, p, batch=ELEMENTS_BATCH):
+        """Returns the order of p without storing the group elements"""
+        n = 0
+        for q in self.iter_elements(p, batch):
+            n += 1
+        return n
+
+    def calc_elements(self, p):
+        return list(self.iter_elements(p))
+
+    def group_order(self):
+        """Returns the group order recorded with set_group_order, or None"""
+        return _order_cache.get(self.curve())
+
+    def dlog(self, p, q, workers=None, dpbits=None, walks=RHO_WALKS):
+        """Returns k where q = k * p using parallel Pollard rho
+
+        Every worker process advances `walks` r-adding walks at once (one
+        shared inversion per step) and reports distinguished points, whose
+        x-coordinate has `dpbits` low zero bits, to a collision table kept
+        by this process. Gives up after RHO_LIMIT * sqrt(n) iterations.
+        """
+        p, q = tuple(p), tuple(q)
+        if q == (-1, -1):
+            return 0
+        n = self.point_order(p)
+        if n < RHO_MIN_ORDER:
+            for k, r in enumerate(self.iter_elements(p), 1):
+                if r == q:
+                    return k % n
+            assert False, 'Point is not in the subgroup generated by the base point'
+        if self.eccmul(q, n) != (-1, -1):
+            assert False, 'Point is not in the subgroup generated by the base point'
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if dpbits is None:
+            dpbits = max(0, n.bit_length() // 2 - 8)
+        # About 1.25 sqrt(n) steps are expected, plus reaching a distinguished point
+        limit = RHO_LIMIT * isqrt(n) + workers * walks * (32 << dpbits)
+        rng = random.SystemRandom()
+        steps = []
+        for i in range(RHO_STEPS):
+            c, d = rng.randrange(n), rng.randrange(n)
+            steps.append((self.eccadd(self.eccmul(p, c), self.eccmul(q, d)), c, d))
+
+        queue = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        procs = [multiprocessing.Process(target=rho_worker,
+            args=(self, p, q, n, steps, dpbits, walks, rng.getrandbits(64), queue, stop))
+            for i in range(workers)]
+        for proc in procs:
+            proc.daemon = True
+            proc.start()
+
+        table = {}
+        iterations = 0
+        start = last = time.time()
+        try:
+            while True:
+                try:
+                    count, points = queue.get(timeout=RHO_PROGRESS)
+                except Empty:
+                    # Workers only exit once stopped, so none alive means they died
+                    if not any([proc.is_alive() for proc in procs]):
+                        assert False, 'All dlog workers exited (exit codes {})'.format(
+                                [proc.exitcode for proc in procs])
+                    continue
+                iterations += count
+                if iterations > limit:
+                    assert False, 'No collision after {} iterations; is the point in the subgroup?'.format(iterations)
+                now = time.time()
+                if now - last >= RHO_PROGRESS:
+                    print('dlog: {} iterations, {:.0f} it/s, {} distinguished points'.format(
+                        iterations, iterations / (now - start), len(table)), file=sys.stderr)
+                    last = now
+                for x, y, a, b in points:
+                    if x not in table:
+                        table[x] = (y, a, b)
+                        continue
+                    y2, a2, b2 = table[x]
+                    # aP + bQ = +-(a2 P + b2 Q)
+                    if y != y2:
+                        a2, b2 = -a2, -b2
+                    for k in rho_solve(n, a, b, a2, b2):
+                        if self.eccmul(p, k) == q:
+                            log('dlog: {} iterations in {:.1f}s', iterations, time.time() - start)
+                            return k
+        finally:
+            stop.set()
+            for proc in procs:
+                proc.join(1)
+                if proc.is_alive():
+                    proc.terminate()
+
+    def field_bytes(self):
+        """Returns the octet length of a field element"""
+        return (self.modulo.bit_length() + 7) // 8
+
+    def is_on_curve(self, p):
+        assert False, 'Point validation is not available for this polynomial'
+
+    def compress_bit(self, p):
+        assert False, 'Point compression is not available for this polynomial'
+
+    def decompress(self, x, bit):
+        assert False, 'Point compression is not available for this polynomial'
+
+    def encode_point(self, p, compressed=True):
+        """Returns the SEC1 octet string of p (02/03 || x, or 04 || x || y)"""
+        x, y = p
+        if x < 0 or y < 0:
+            return b'\x00'
+        n = self.field_bytes()
+        if compressed:
+            return bytes([2 + self.compress_bit(p)]) + x.to_bytes(n, 'big')
+        return b'\x04' + x.to_bytes(n, 'big') + y.to_bytes(n, 'big')
+
+    def decode_point(self, data):
+        """Returns the point of a SEC1 octet string, checked to lie on the curve"""
+        n = self.field_bytes()
+        if data == b'\x00':
+            return ECCPoint(-1, -1)
+        if len(data) == n + 1 and data[0] in (2, 3):
+            p = self.decompress(int.from_bytes(data[1:], 'big'), data[0] & 1)
+        elif len(data) == 2 * n + 1 and data[0] in (4, 6, 7):
+            p = ECCPoint(int.from_bytes(data[1:n + 1], 'big'), int.from_bytes(data[n + 1:], 'big'))
+            if data[0] != 4 and self.compress_bit(p) != data[0] & 1:
+                assert False, 'Invalid hybrid point encoding'
+        else:
+            assert False, 'Invalid point encoding'
+        if not self.is_on_curve(p):
+            assert False, 'Point is not on the polynomial'
+        return p
+
+    def set_group_order(self, n):
+        """Records a known group order, checked against a random point"""
+        if self.eccmul(self.random_point(), n) != (-1, -1):
+            assert False, 'Invalid group order {}'.format(n)
+        _order_cache[self.curve()] = n
+
+    def point_order(self, p):
+        """Returns the order of p from the factored group order
+
+        Without a known group order the multiples of p are enumerated.
+        """
+        n = self.group_order()
+        if n is None:
+            return self.element_order(p)
+        for q in sorted(set(factorize(n))):
+            while n % q == 0 and self.eccmul(p, n // q) == (-1, -1):
+                n //= q
+        return n
 
 class ECCSimplePoly(ECCPoly):
     """Simple ECC Polynomial Structure: y^2 = x^3 + ax + b"""
@@ -275,7 +1452,608 @@ class ECCSimplePoly(ECCPoly):
                 (beta, alpha),
                 modulo,
                 simple_eccdouble,
-                simple_eccadd)
+                simple_eccadd,
+                ECCProjective(
+                    simple_tojacobian,
+                    simple_fromjacobian,
+                    simple_jacobian_double,
+                    simple_jacobian_add,
+                    simple_jacobian_madd),
+                simple_eccneg,
+                simple_eccbatchadd)
+
+    def eccmul(self, p, s, width=None):
+        """Returns s * p, split over the GLV endomorphism when the curve has one"""
+        glv = self.glv()
+        if glv is None or not isinstance(s, int) or p[0] < 0 or p[1] < 0:
+            return super(ECCSimplePoly, self).eccmul(p, s, width)
+        n, beta, lam, basis = glv
+        k1, k2 = glv_split(s % n, n, basis)
+        log('GLV: {} = {} + {} * lambda', s, k1, k2)
+        return self.multi_mul([p, (beta * p[0] % self.modulo, p[1])], [k1, k2], width)
+
+    def glv(self):
+        """Returns (n, beta, lambda, basis) for curves with a = 0 and p = 1 mod 3
+
+        phi(x, y) = (beta x, y) acts as multiplication by lambda on the
+        points of prime order n. Only used once the group order is known
+        (counted or set with -n) and prime; cached per curve.
+        """
+        key = self.curve()
+        if key in _glv_cache:
+            return _glv_cache[key]
+        alpha, beta = self.coefficients
+        modulo = self.modulo
+        if alpha != 0 or modulo % 3 != 1 or modulo < GROUP_ORDER_NAIVE:
+            _glv_cache[key] = None
+            return None
+        n = _order_cache.get(key)
+        if n is None:
+            return None
+        # Cached first: the lambda check below multiplies
+        _glv_cache[key] = None
+        if n % 3 != 1 or not is_probable_prime(n):
+            return None
+        rng = random.Random(modulo)
+        cube = 1
+        while cube == 1:
+            cube = pow(rng.randrange(2, modulo), (modulo - 1) // 3, modulo)
+        lam = ((modsqrt(n - 3, n) - 1) * modinverse(2, n)) % n
+        q = self.random_point(rng)
+        lq = self.eccmul(q, lam)
+        for b in (cube, (cube * cube) % modulo):
+            if lq == ((b * q[0]) % modulo, q[1]):
+                _glv_cache[key] = (n, b, lam, glv_basis(n, lam))
+                log('GLV: beta = {}, lambda = {}', b, lam)
+                break
+        return _glv_cache[key]
+
+    def random_point(self, rng=random):
+        alpha, beta = self.coefficients
+        modulo = self.modulo
+        while True:
+            x = rng.randrange(modulo)
+            rhs = (x * x * x + alpha * x + beta) % modulo
+            if rhs == 0:
+                return ECCPoint(x, 0)
+            if legendre(rhs, modulo) == 1:
+                return ECCPoint(x, modsqrt(rhs, modulo))
+
+    def is_on_curve(self, p):
+        alpha, beta = self.coefficients
+        modulo = self.modulo
+        x, y = p
+        if x == -1 and y == -1:
+            return True
+        if not (0 <= x < modulo and 0 <= y < modulo):
+            return False
+        return (y * y - (x * x * x + alpha * x + beta)) % modulo == 0
+
+    def compress_bit(self, p):
+        return p[1] & 1
+
+    def decompress(self, x, bit):
+        """Returns the point with x-coordinate x and y of parity bit (modsqrt)"""
+        alpha, beta = self.coefficients
+        modulo = self.modulo
+        if x >= modulo:
+            assert False, 'Invalid x-coordinate'
+        y = modsqrt((x * x * x + alpha * x + beta) % modulo, modulo)
+        if y & 1 != bit:
+            if y == 0:
+                assert False, 'Invalid compressed point'
+            y = modulo - y
+        return ECCPoint(x, y)
+
+    def ladder(self, p, s):
+        """Returns s * p with the x-only Montgomery ladder
+
+        Every bit costs one doubling and one differential addition in
+        (X : Z) coordinates over a fixed number of bits; y is recovered at
+        the end (Okeya-Sakurai) with a single inversion.
+        """
+        if not isinstance(s, int):
+            assert False, 'Invalid scalar data type'
+        x, y = p
+        if x < 0 or y < 0:
+            return ECCPoint(-1, -1)
+        if s < 0:
+            p, s = self.eccneg(p), -s
+            x, y = p
+        modulo = self.modulo
+        if y == 0:
+            # Order two: 2y cannot be inverted for the y recovery
+            return ECCPoint(x, y) if s % 2 == 1 else ECCPoint(-1, -1)
+
+        # R0 = kP, R1 = (k + 1)P, starting from k = 0
+        X0, Z0 = 1, 0
+        X1, Z1 = x, 1
+        for i in range(max(s.bit_length(), modulo.bit_length() + 1) - 1, -1, -1):
+            if (s >> i) & 1:
+                X0, Z0 = simple_xz_diffadd(self, X0, Z0, X1, Z1, x)
+                X1, Z1 = simple_xz_double(self, X1, Z1)
+            else:
+                X1, Z1 = simple_xz_diffadd(self, X0, Z0, X1, Z1, x)
+                X0, Z0 = simple_xz_double(self, X0, Z0)
+
+        if Z0 == 0:
+            return ECCPoint(-1, -1)
+        if Z1 == 0:
+            # sP + P = O
+            return ECCPoint(x, (-y) % modulo)
+        alpha, beta = self.coefficients
+        z0inv, z1inv, yinv = batch_modinverse([Z0, Z1, 2 * y], modulo)
+        x0 = (X0 * z0inv) % modulo
+        x1 = (X1 * z1inv) % modulo
+        t = x - x0
+        y0 = ((2 * beta + (alpha + x * x0) * (x + x0) - x1 * t * t) * yinv) % modulo
+        return ECCPoint(x0, y0)
+
+    def group_order(self):
+        """Returns #E(F_p), cached per curve
+
+        Small p sum Legendre symbols directly. Otherwise Mestre's method:
+        baby-step giant-step finds the multiples of random points (of the
+        curve and its quadratic twist) in the Hasse interval until a single
+        candidate is left.
+        """
+        key = self.curve()
+        if key in _order_cache:
+            return _order_cache[key]
+        alpha, beta = self.coefficients
+        modulo = self.modulo
+        if modulo < GROUP_ORDER_NAIVE:
+            n = modulo + 1
+            for x in range(modulo):
+                n += legendre((x * x * x + alpha * x + beta) % modulo, modulo)
+        else:
+            n = self.__mestre()
+        _order_cache[key] = n
+        return n
+
+    def __mestre(self):
+        alpha, beta = self.coefficients
+        modulo = self.modulo
+        t = isqrt(4 * modulo)
+        lo, hi = modulo + 1 - t, modulo + 1 + t
+        d = 2
+        while legendre(d, modulo) != -1:
+            d += 1
+        twist = ECCSimplePoly((beta * d * d * d) % modulo, (alpha * d * d) % modulo, modulo)
+        rng = random.Random(modulo)
+        candidates = set(range(lo, hi + 1)) if hi - lo < 64 else None
+        for attempt in range(MESTRE_ATTEMPTS):
+            # The twist has order 2p + 2 - #E
+            curve = twist if attempt % 2 == 1 else self
+            multiples = curve.__bsgs_multiples(curve.random_point(rng), lo, hi)
+            if multiples is None:
+                continue
+            if curve is twist:
+                multiples = [2 * modulo + 2 - m for m in multiples]
+            candidates = set(multiples) if candidates is None else candidates & set(multiples)
+            log('Mestre attempt {}: {} candidate(s)', attempt, len(candidates))
+            if len(candidates) == 1:
+                return candidates.pop()
+        assert False, 'Could not determine the group order'
+
+    def __bsgs_multiples(self, p, lo, hi):
+        """Returns every m in [lo, hi] with m * p = O, or None if p has small order"""
+        s = isqrt((hi - lo) // 2) + 1
+        baby = {}
+        for j, q in enumerate(self.iter_elements(p), 1):
+            if q[0] < 0 or q[1] < 0 or q[0] in baby:
+                return None
+            baby[q[0]] = (j, q[1])
+            if j == s:
+                break
+        # Giant steps c = lo + s, lo + 3s + 1, ... each cover [c - s, c + s]
+        step = 2 * s + 1
+        c = lo + s
+        q = self.eccmul(p, c)
+        g = self.eccmul(p, step)
+        multiples = []
+        while c - s <= hi:
+            if q[0] < 0 or q[1] < 0:
+                multiples.append(c)
+            elif q[0] in baby:
+                j, y = baby[q[0]]
+                multiples.append(c - j if q[1] == y else c + j)
+            q = self.eccadd(q, g)
+            c += step
+        return [m for m in multiples if lo <= m <= hi]
+
+class ECCSupersingularPoly(ECCPoly):
+    """Supersingular ECC Polynomial Structure over GF(2^m): y^2 + cy = x^3 + bx + a
+
+    The modulo is the irreducible polynomial of GF(2^m) as a bit vector.
+    """
+
+    def __init__(self, alpha, beta, gamma, modulo):
+        if gamma == 0:
+            assert False, 'Gamma must be non-zero'
+        if not gf2_is_irreducible(modulo):
+            assert False, 'The field polynomial {:#x} is reducible'.format(modulo)
+        super(ECCSupersingularPoly, self).__init__(
+                (beta, alpha, gamma),
+                modulo,
+                supersingular_eccdouble,
+                supersingular_eccadd,
+                ECCProjective(
+                    supersingular_toproj,
+                    supersingular_fromproj,
+                    supersingular_proj_double,
+                    supersingular_proj_add,
+                    supersingular_proj_madd),
+                supersingular_eccneg)
+        self.gammainv = gf2_inverse(gamma, modulo)
+
+    def field_bytes(self):
+        return (gf2_terms(self.modulo)[0] + 7) // 8
+
+    def is_on_curve(self, p):
+        beta, alpha, gamma = self.coefficients
+        modulo = self.modulo
+        x, y = p
+        if x == -1 and y == -1:
+            return True
+        m = gf2_terms(modulo)[0]
+        if x < 0 or y < 0 or x >> m or y >> m:
+            return False
+        return (gf2_sqr(y, modulo) ^ gf2_mul(gamma, y, modulo)) == (
+                gf2_mul(gf2_sqr(x, modulo), x, modulo) ^ gf2_mul(beta, x, modulo) ^ alpha)
+
+    def compress_bit(self, p):
+        """Not covered by SEC1: the low bit of z = y / c picks one of z, z + 1"""
+        return gf2_mul(p[1], self.gammainv, self.modulo) & 1
+
+    def decompress(self, x, bit):
+        beta, alpha, gamma = self.coefficients
+        modulo = self.modulo
+        rhs = gf2_mul(gf2_sqr(x, modulo), x, modulo) ^ gf2_mul(beta, x, modulo) ^ alpha
+        z = gf2_solve_quadratic(gf2_mul(rhs, gf2_sqr(self.gammainv, modulo), modulo), modulo)
+        if z is None:
+            assert False, 'Invalid compressed point'
+        if z & 1 != bit:
+            z ^= 1
+        return ECCPoint(x, gf2_mul(gamma, z, modulo))
+
+    def random_point(self, rng=random):
+        beta, alpha, gamma = self.coefficients
+        modulo = self.modulo
+        m = gf2_terms(modulo)[0]
+        while True:
+            x = rng.randrange(1 << m)
+            # y = cz with z^2 + z = (x^3 + bx + a) / c^2
+            rhs = gf2_mul(gf2_sqr(x, modulo), x, modulo) ^ gf2_mul(beta, x, modulo) ^ alpha
+            z = gf2_solve_quadratic(gf2_mul(rhs, gf2_sqr(self.gammainv, modulo), modulo), modulo, rng)
+            if z is not None:
+                return ECCPoint(x, gf2_mul(gamma, z, modulo))
+
+class ECCNonSupersingularPoly(ECCPoly):
+    """Non-supersingular ECC Polynomial Structure over GF(2^m): y^2 + xy = x^3 + bx^2 + a
+
+    The modulo is the irreducible polynomial of GF(2^m) as a bit vector.
+    """
+
+    def __init__(self, alpha, beta, modulo):
+        if alpha == 0:
+            assert False, 'Alpha must be non-zero'
+        if not gf2_is_irreducible(modulo):
+            assert False, 'The field polynomial {:#x} is reducible'.format(modulo)
+        super(ECCNonSupersingularPoly, self).__init__(
+                (beta, alpha),
+                modulo,
+                nonsupersingular_eccdouble,
+                nonsupersingular_eccadd,
+                ECCProjective(
+                    nonsupersingular_tolopezdahab,
+                    nonsupersingular_fromlopezdahab,
+                    nonsupersingular_lopezdahab_double,
+                    nonsupersingular_lopezdahab_add,
+                    nonsupersingular_lopezdahab_madd),
+                nonsupersingular_eccneg)
+
+    def field_bytes(self):
+        return (gf2_terms(self.modulo)[0] + 7) // 8
+
+    def is_on_curve(self, p):
+        beta, alpha = self.coefficients
+        modulo = self.modulo
+        x, y = p
+        if x == -1 and y == -1:
+            return True
+        m = gf2_terms(modulo)[0]
+        if x < 0 or y < 0 or x >> m or y >> m:
+            return False
+        xx = gf2_sqr(x, modulo)
+        return (gf2_sqr(y, modulo) ^ gf2_mul(x, y, modulo)) == (
+                gf2_mul(xx, x, modulo) ^ gf2_mul(beta, xx, modulo) ^ alpha)
+
+    def compress_bit(self, p):
+        """SEC1: the low bit of y / x (0 when x = 0)"""
+        x, y = p
+        if x == 0:
+            return 0
+        return gf2_mul(y, gf2_inverse(x, self.modulo), self.modulo) & 1
+
+    def decompress(self, x, bit):
+        beta, alpha = self.coefficients
+        modulo = self.modulo
+        m = gf2_terms(modulo)[0]
+        if x == 0:
+            y = alpha
+            for i in range(m - 1):
+                y = gf2_sqr(y, modulo)
+            return ECCPoint(0, y)
+        xinv = gf2_inverse(x, modulo)
+        z = gf2_solve_quadratic(x ^ beta ^ gf2_mul(alpha, gf2_sqr(xinv, modulo), modulo), modulo)
+        if z is None:
+            assert False, 'Invalid compressed point'
+        if z & 1 != bit:
+            z ^= 1
+        return ECCPoint(x, gf2_mul(x, z, modulo))
+
+    def random_point(self, rng=random):
+        beta, alpha = self.coefficients
+        modulo = self.modulo
+        m = gf2_terms(modulo)[0]
+        while True:
+            x = rng.randrange(1 << m)
+            if x == 0:
+                # y = sqrt(a) = a^(2^(m - 1))
+                y = alpha
+                for i in range(m - 1):
+                    y = gf2_sqr(y, modulo)
+                return ECCPoint(0, y)
+            # y = xz with z^2 + z = x + b + a / x^2
+            xinv = gf2_inverse(x, modulo)
+            z = gf2_solve_quadratic(x ^ beta ^ gf2_mul(alpha, gf2_sqr(xinv, modulo), modulo), modulo, rng)
+            if z is not None:
+                return ECCPoint(x, gf2_mul(x, z, modulo))
+
+def glv_basis(n, lam):
+    """Returns short vectors (a1, b1), (a2, b2) with a + b lambda = 0 mod n
+
+    Extended Euclid on (n, lambda) stopped around sqrt(n).
+    """
+    r0, r1 = n, lam
+    t0, t1 = 0, 1
+    bound = isqrt(n)
+    while r1 >= bound:
+        q = r0 // r1
+        r0, r1 = r1, r0 - q * r1
+        t0, t1 = t1, t0 - q * t1
+    # r0 is the last remainder >= sqrt(n), r1 the first one below
+    a1, b1 = r1, -t1
+    q = r0 // r1
+    r2, t2 = r0 - q * r1, t0 - q * t1
+    if r0 * r0 + t0 * t0 <= r2 * r2 + t2 * t2:
+        a2, b2 = r0, -t0
+    else:
+        a2, b2 = r2, -t2
+    return (a1, b1, a2, b2)
+
+def glv_split(k, n, basis):
+    """Returns (k1, k2), both about sqrt(n), with k = k1 + k2 lambda mod n"""
+    a1, b1, a2, b2 = basis
+    c1 = (2 * b2 * k + n) // (2 * n)
+    c2 = (-2 * b1 * k + n) // (2 * n)
+    return (k - c1 * a1 - c2 * a2, -c1 * b1 - c2 * b2)
+
+
+#####################################################################
+# Pollard Rho
+#####################################################################
+
+def rho_worker(poly, p, q, n, steps, dpbits, walks, seed, queue, stop):
+    """Runs r-adding walks, reporting (iterations, distinguished points)"""
+    rng = random.Random(seed)
+    r = len(steps)
+    dpmask = (1 << dpbits) - 1
+    maxlen = 32 << dpbits
+
+    def restart():
+        a, b = rng.randrange(n), rng.randrange(n)
+        return [poly.eccadd(poly.eccmul(p, a), poly.eccmul(q, b)), a, b, 0]
+
+    state = [restart() for i in range(walks)]
+    iterations = 0
+    found = []
+    while not stop.is_set():
+        for i in range(RHO_REPORT):
+            idx = [w[0][0] % r for w in state]
+            points = poly.eccpairadd([w[0] for w in state], [steps[j][0] for j in idx])
+            for w, j, point in zip(state, idx, points):
+                w[0] = point
+                w[1] = (w[1] + steps[j][1]) % n
+                w[2] = (w[2] + steps[j][2]) % n
+                w[3] += 1
+            for i, w in enumerate(state):
+                x, y = w[0]
+                if x < 0 or y < 0 or w[3] > maxlen:
+                    # Hit infinity or probably stuck in a cycle
+                    state[i] = restart()
+                elif x & dpmask == 0:
+                    found.append((x, y, w[1], w[2]))
+                    state[i] = restart()
+        iterations += RHO_REPORT * walks
+        queue.put((iterations, found))
+        iterations = 0
+        found = []
+
+def rho_solve(n, a1, b1, a2, b2):
+    """Returns the candidates k with a1 + b1 k = a2 + b2 k mod n"""
+    db = (b1 - b2) % n
+    da = (a2 - a1) % n
+    g = euclidean(db, n)[0] if db != 0 else n
+    if da % g != 0 or g > RHO_MAX_GCD:
+        return []
+    m = n // g
+    k0 = ((da // g) * modinverse(db // g, m)) % m if m > 1 else 0
+    return [k0 + i * m for i in range(g)]
+
+
+#####################################################################
+# Batch Multiplication
+#####################################################################
+
+BATCH_CHUNK = 64
+BATCH_SLAB = 64 * BATCH_CHUNK
+
+_batch_state = None
+
+def batch_init(poly, width, ladder):
+    global _batch_state
+    _batch_state = (poly, width, ladder)
+
+def batch_worker(record):
+    poly, width, ladder = _batch_state
+    x, y, scalar = record
+    if ladder:
+        ret_x, ret_y = poly.ladder((x, y), scalar)
+    else:
+        ret_x, ret_y = poly.eccmul((x, y), scalar, width)
+    return (x, y, scalar, ret_x, ret_y)
+
+def batch_records(fin):
+    """Yields (x, y, k) from lines of whitespace separated numbers, skipping blanks and # comments"""
+    for lineno, line in enumerate(fin, 1):
+        line = line.split('#', 1)[0].split()
+        if len(line) == 0:
+            continue
+        if len(line) != 3:
+            raise ValueError('line {}: expected x y k'.format(lineno))
+        yield tuple(int(v, 0) for v in line)
+
+def batch_multiply(poly, fin, width=None, ladder=False, workers=None):
+    """Yields (x, y, k, kx, ky) for every record of fin in input order"""
+    return pool_map(batch_worker, batch_records(fin), workers, batch_init, (poly, width, ladder))
+
+def pool_map(func, records, workers, initializer, initargs):
+    """Yields func(record) for every record in input order
+
+    Records are read in slabs of BATCH_SLAB and handed to the worker pool
+    in chunks of BATCH_CHUNK, so the input is never held in memory at once.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        initializer(*initargs)
+        for record in records:
+            yield func(record)
+        return
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as pool:
+        while True:
+            slab = []
+            for record in records:
+                slab.append(record)
+                if len(slab) == BATCH_SLAB:
+                    break
+            if len(slab) == 0:
+                return
+            for result in pool.map(func, slab, chunksize=BATCH_CHUNK):
+                yield result
+
+
+#####################################################################
+# ECDSA
+#####################################################################
+
+def ecdsa_hash(message, n):
+    """Returns SHA-256(message) truncated to the bit length of n"""
+    e = int.from_bytes(hashlib.sha256(message).digest(), 'big')
+    return e >> max(0, 256 - n.bit_length())
+
+ECDSA_MIN_ORDER = 1 << 16
+ECDSA_ATTEMPTS = 64
+
+_ecdsa_orders = set()
+
+def ecdsa_check_order(n):
+    """Asserts that the base point order n is a large enough prime"""
+    if n in _ecdsa_orders:
+        return
+    if n < ECDSA_MIN_ORDER or not is_probable_prime(n):
+        assert False, 'ECDSA needs a base point of prime order >= {} (order is {})'.format(
+                ECDSA_MIN_ORDER, n)
+    _ecdsa_orders.add(n)
+
+def ecdsa_keygen(poly, g, n, rng=None):
+    """Returns (d, Q = d * G)"""
+    ecdsa_check_order(n)
+    rng = rng or random.SystemRandom()
+    d = rng.randrange(1, n)
+    return d, poly.fixedmul(g, d)
+
+def ecdsa_sign(poly, g, n, d, message, rng=None):
+    """Returns the signature (r, s) of message with the private key d"""
+    ecdsa_check_order(n)
+    rng = rng or random.SystemRandom()
+    e = ecdsa_hash(message, n)
+    for attempt in range(ECDSA_ATTEMPTS):
+        k = rng.randrange(1, n)
+        r = poly.fixedmul(g, k)[0] % n
+        if r == 0:
+            continue
+        s = (modinverse(k, n) * (e + r * d)) % n
+        if s != 0:
+            return r, s
+    assert False, 'No valid nonce after {} attempts'.format(ECDSA_ATTEMPTS)
+
+def ecdsa_verify(poly, g, n, q, message, signature):
+    """Checks the signature (r, s) of message against the public key Q
+
+    u1 * G + u2 * Q is one joint multiplication over the fixed-base table
+    of G, which is cached across calls.
+    """
+    ecdsa_check_order(n)
+    r, s = signature
+    if not (0 < r < n and 0 < s < n):
+        return False
+    if q[0] < 0 or q[1] < 0:
+        return False
+    w = modinverse(s, n)
+    e = ecdsa_hash(message, n)
+    x, y = poly.fixedmul_add(g, (e * w) % n, q, (r * w) % n)
+    if x < 0 or y < 0:
+        return False
+    return x % n == r
+
+def verify_records(fin):
+    """Yields (pubkey, r, s, message) from "pubkey r s message" lines
+
+    pubkey is SEC1 hex and the message is the rest of the line.
+    """
+    for lineno, line in enumerate(fin, 1):
+        line = line.rstrip('\r\n')
+        if len(line.strip()) == 0 or line.startswith('#'):
+            continue
+        fields = line.split(None, 3)
+        if len(fields) < 3:
+            raise ValueError('line {}: expected pubkey r s message'.format(lineno))
+        message = fields[3] if len(fields) == 4 else ''
+        yield (fields[0], int(fields[1], 0), int(fields[2], 0), message)
+
+_verify_state = None
+
+def verify_init(poly, g, n):
+    global _verify_state
+    _verify_state = (poly, g, n)
+    poly.precompute(g)
+
+def verify_worker(record):
+    poly, g, n = _verify_state
+    pubkey, r, s, message = record
+    try:
+        q = poly.decode_point(bytes.fromhex(pubkey))
+    except (AssertionError, ValueError):
+        return False
+    return ecdsa_verify(poly, g, n, q, message.encode(), (r, s))
+
+def batch_verify(poly, g, n, fin, workers=None):
+    """Yields the verification result of every record of fin in input order"""
+    ecdsa_check_order(n)
+    return pool_map(verify_worker, verify_records(fin), workers, verify_init, (poly, g, n))
 
 
 #####################################################################
@@ -290,8 +2068,18 @@ def print_usage_and_exit(exitcode):
     print('ACTIONS\t\tARGS\t\tDESCRIPTION')
     print('listgroup\tx y\t\tLists the elements given the generator')
     print('multiply\tx y scalar\tMultiplies a point with a scalar')
+    print('multimul\tx y k [x y k...]\tSum of scalar multiples (Straus/Pippenger)')
+    print('batchmultiply\t[file]\t\tMultiplies "x y k" lines from file (or stdin)')
     print('add\t\tx1 y1 x2 y2\tAdds two points')
     print('polyinverse\tx y k\t\tPolynomial multiplicative inverse')
+    print('keygen\t\tgx gy\t\tECDSA key pair for the base point')
+    print('sign\t\tgx gy d msg\tECDSA signature (SHA-256) of msg')
+    print('verify\t\tgx gy qx qy r s msg\tChecks an ECDSA signature')
+    print('batchverify\tgx gy [file]\tChecks "pubkey r s msg" lines (SEC1 hex pubkey)')
+    print('encode\t\tx y\t\tSEC1 compressed and uncompressed encodings')
+    print('decode\t\thex\t\tDecodes a SEC1 encoded point')
+    print('order\t\t[x y]\t\tGroup order (and point order)')
+    print('dlog\t\tx1 y1 x2 y2\tSolves (x2; y2) = k * (x1; y1) with Pollard rho')
     print('modinverse\tk p\t\tModular multiplicative inverse')
     print('')
     print('OPTIONS')
@@ -300,7 +2088,13 @@ def print_usage_and_exit(exitcode):
     print('  -a alpha\tAlpha coefficient')
     print('  -b beta\tBeta coefficient')
     print('  -c gamma\tGamma coefficient')
-    print('  -p modulo\tPolynomial modulo')
+    print('  -p modulo\tPolynomial modulo: a prime, or the GF(2^m) reduction polynomial')
+    print('\t\tas a bit vector for -2/-3 (numbers may be given as 0x...)')
+    print('  -w width\tScalar multiplication window width (default by scalar size)')
+    print('  -P file\tFixed-base table for multiply (loaded, or built and saved)')
+    print('  -n order\tKnown group order (skips point counting)')
+    print('  -j workers\tWorker processes for dlog/batchmultiply/batchverify (default CPU count)')
+    print('  -l\t\tUse the x-only Montgomery ladder for multiply')
     print('  -1\t\tSimple: y^2 = x^3 + bx + a (default)')
     print('  -2\t\tSupersingular: y^2 + cy = x^3 + bx + a')
     print('  -3\t\tNon-supersingular: y^2 + xy = x^3 + bx^2 + a')
@@ -1,14 +1,19 @@
 #!/usr/bin/python3
 
-import sys, getopt
+import sys, getopt, math
+from numtheory import modinverse, batch_modinverse_checked
+
+BATCH_CHUNK = 4096
 
 def main(argv):
 
     m = None
+    batch = False
+    chunk = BATCH_CHUNK
 
     # Parse options
     try:
-        oplist, args = getopt.getopt(argv, 'hm:')
+        oplist, args = getopt.getopt(argv, 'hm:bc:')
     except getopt.GetoptError as err:
         print(err)
         return
@@ -17,34 +22,94 @@ def main(argv):
         if op == '-h':
             print_usage_and_exit()
         elif op == '-m':
-            m = int(arg)
+            m = int(arg, 0)
+        elif op == '-b':
+            batch = True
+        elif op == '-c':
+            chunk = int(arg)
         else:
             assert False, 'Unhandled option'
 
-    for arg in args:
-        a = int(arg)
-        print('{}^-1 mod {} = {}'.format(a, m, modular_inverse(a, m)))
-
-
-def euclidean(a, b, verbose=False):
-    """Returns (gcd, x, y) where a * x + b * y = gcd"""
-    x2, x1 = 0, 1
-    y2, y1 = 1, 0
-    r2, r1 = b, a
-    while r2 != 0:
-        q = int(r1 / r2)
-        r1, r2 = r2, r1 - (q * r2)
-        x1, x2 = x2, x1 - (q * x2)
-        y1, y2 = y2, y1 - (q * y2)
-    return r1, x1, y1
-
-
-def modular_inverse(n, p, verbose=False):
-    """Returns ninv where n * ninv = 1 mod p"""
-    gcd, x, y = euclidean(n, p, verbose)
-    assert (n * x + p * y) % p == gcd
-    assert gcd == 1, 'No modular multiplicative inverse exists gcd({}, {}) = {}'.format(n, p, gcd)
-    return x % p
+    if not m or m < 2 or chunk < 1:
+        print_usage_and_exit(1)
+
+    # Batch mode: values from files (or stdin)
+    if batch:
+        failed = 0
+        for path in args or ['-']:
+            fin = sys.stdin if path == '-' else open(path, 'r')
+            try:
+                failed += batch_inverse(fin, sys.stdout, m, chunk)
+            except ValueError as err:
+                print('ERROR: {}'.format(err), file=sys.stderr)
+                sys.exit(1)
+            finally:
+                if fin is not sys.stdin:
+                    fin.close()
+        if failed > 0:
+            print('{} value(s) not invertible mod {}'.format(failed, m), file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if len(args) == 0:
+        print_usage_and_exit(1)
+    try:
+        values = [int(arg, 0) for arg in args]
+    except ValueError as err:
+        print('ERROR: {}'.format(err), file=sys.stderr)
+        sys.exit(1)
+    failed = 0
+    for a in values:
+        if math.gcd(a, m) != 1:
+            print('{}^-1 mod {} does not exist: gcd = {}'.format(a, m, math.gcd(a, m)))
+            failed += 1
+        else:
+            print('{}^-1 mod {} = {}'.format(a, m, modinverse(a, m)))
+    if failed > 0:
+        print('{} value(s) not invertible mod {}'.format(failed, m), file=sys.stderr)
+        sys.exit(1)
+
+
+def read_chunks(fin, chunk):
+    """Yields lists of up to chunk whitespace separated integers"""
+    values = []
+    for line in fin:
+        for token in line.split():
+            values.append(int(token, 0))
+            if len(values) == chunk:
+                yield values
+                values = []
+    if len(values) > 0:
+        yield values
+
+
+def batch_inverse(fin, fout, m, chunk=BATCH_CHUNK):
+    """Writes the inverse of every value in fin, a chunk at a time
+
+    Each chunk costs one inversion (Montgomery's simultaneous inversion).
+    Values sharing a factor with m are reported with their gcd. Returns the
+    number of those.
+    """
+    failed = 0
+    for values in read_chunks(fin, chunk):
+        lines = []
+        for a, ainv in zip(values, batch_modinverse_checked(values, m)):
+            if ainv is None:
+                lines.append('{}^-1 mod {} does not exist: gcd = {}\n'.format(a, m, math.gcd(a, m)))
+                failed += 1
+            else:
+                lines.append('{}^-1 mod {} = {}\n'.format(a, m, ainv))
+        fout.write(''.join(lines))
+    return failed
+
+
+def print_usage_and_exit(code=0):
+    print('Usage: {} -m modulus a1 [a2...]'.format(sys.argv[0]))
+    print('       {} -m modulus -b [-c chunk] [file...]'.format(sys.argv[0]))
+    print('')
+    print('  -b\t\tBatch mode: inverts the values in the files (or stdin)')
+    print('  -c chunk\tValues per simultaneous inversion (default {})'.format(BATCH_CHUNK))
+    sys.exit(code)
 
 
 if __name__ == '__main__':
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 
 import sys, getopt, math
+from numtheory import modinverse
 
 VERBOSE = False
 NONE = 0
@@ -69,35 +70,12 @@ def main(argv):
         print(MP(ret, 1, m, R))
 
 
-def euclidean(a, b, verbose=False):
-    """Returns (gcd, x, y) where a * x + b * y = gcd"""
-    x2, x1 = 0, 1
-    y2, y1 = 1, 0
-    r2, r1 = b, a
-    debug('{}\t{}\t{}\t{}'.format('-', r2, x2, y2), verbose)
-    while r2 != 0:
-        q = int(r1 / r2)
-        r1, r2 = r2, r1 - (q * r2)
-        x1, x2 = x2, x1 - (q * x2)
-        y1, y2 = y2, y1 - (q * y2)
-        debug('{}\t{}\t{}\t{}'.format(q, r2, x2, y2), verbose)
-    return r1, x1, y1
-
-
-def modular_inverse(n, p, verbose=False):
-    """Returns ninv where n * ninv = 1 mod p"""
-    gcd, x, y = euclidean(n, p, verbose)
-    assert (n * x + p * y) % p == gcd
-    assert gcd == 1, 'No modular multiplicative inverse exists gcd({}, {}) = {}'.format(n, p, gcd)
-    return x % p
-
-
 def MPReduce(T, m, R):
     assert R > m, 'Cannot transform: R must get greater than m'
     assert math.gcd(R, m) == 1, 'Cannot transform: gcd(R, m) != 1'
-    Rinv = modular_inverse(R, m)
+    Rinv = modinverse(R, m)
     debug('R^-1 mod m = {}'.format(Rinv))
-    minv = modular_inverse(m, R)
+    minv = modinverse(m, R)
     debug('m^-1 mod R = {}'.format(minv))
     mprime = (-minv) % R
     debug('m\' mod R = {}'.format(mprime))
@@ -113,7 +91,7 @@ def MPReduce(T, m, R):
 def MP(X, Y, m, R):
     assert R > m, 'Cannot transform: R must get greater than m'
     assert math.gcd(R, m) == 1, 'Cannot transform: gcd(R, m) != 1'
-    Rinv = modular_inverse(R, m)
+    Rinv = modinverse(R, m)
     debug('R^-1 = {}'.format(Rinv))
     A = (X * Y * Rinv) % m
     debug('{} * {} * R^-1 mod m = {}'.format(X, Y, A))
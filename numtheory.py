@@ -0,0 +1,246 @@
+#!/usr/bin/python3
+
+###
+# Brian Hession
+#
+# Number theory helpers shared by the tools: extended gcd, modular
+# inverses, square roots, primality and factorization
+#
+
+import sys, math, random
+
+# Operands with more bits than this go through Lehmer's extended gcd; below
+# about 2-3k bits the plain loop is faster
+LEHMER_THRESHOLD = 3072
+LEHMER_DIGIT = 62
+
+def euclidean(a, b):
+    """Returns (gcd, x, y) where a * x + b * y = gcd"""
+    if a >= 0 and b >= 0 and min(a, b).bit_length() > LEHMER_THRESHOLD:
+        return lehmer_euclidean(a, b)
+    x2, x1 = 0, 1
+    y2, y1 = 1, 0
+    r2, r1 = b, a
+    while r2 != 0:
+        q = r1 // r2
+        r1, r2 = r2, r1 - (q * r2)
+        x1, x2 = x2, x1 - (q * x2)
+        y1, y2 = y2, y1 - (q * y2)
+    return r1, x1, y1
+
+def lehmer_euclidean(a, b):
+    """Returns (gcd, x, y) where a * x + b * y = gcd, for a, b >= 0
+
+    Lehmer's method: runs the quotient sequence on the leading
+    LEHMER_DIGIT bits in machine-sized ints and applies the collected
+    2x2 matrix to the full operands once per digit instead of per step.
+    """
+    swapped = a < b
+    if swapped:
+        a, b = b, a
+    # a = x0 * a0 + y0 * b0, b = x1 * a0 + y1 * b0
+    x0, y0, x1, y1 = 1, 0, 0, 1
+    while b.bit_length() > LEHMER_DIGIT:
+        shift = a.bit_length() - LEHMER_DIGIT
+        ah, bh = a >> shift, b >> shift
+        A, B, C, D = 1, 0, 0, 1
+        while bh + C != 0 and bh + D != 0:
+            q = (ah + A) // (bh + C)
+            if q != (ah + B) // (bh + D):
+                break
+            A, C = C, A - q * C
+            B, D = D, B - q * D
+            ah, bh = bh, ah - q * bh
+        if B == 0:
+            q = a // b
+            a, b = b, a - q * b
+            x0, x1 = x1, x0 - q * x1
+            y0, y1 = y1, y0 - q * y1
+        else:
+            a, b = A * a + B * b, C * a + D * b
+            x0, x1 = A * x0 + B * x1, C * x0 + D * x1
+            y0, y1 = A * y0 + B * y1, C * y0 + D * y1
+    while b != 0:
+        q = a // b
+        a, b = b, a - q * b
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    if swapped:
+        return a, y0, x0
+    return a, x0, y0
+
+def modinverse(n, p):
+    """Returns ninv where n * ninv = 1 mod p"""
+    if sys.version_info >= (3, 8):
+        try:
+            return pow(n, -1, p)
+        except ValueError:
+            assert False, 'No modular multiplicative inverse exists gcd({}, {}) = {}'.format(
+                    n, p, math.gcd(n, p))
+    # No pow(n, -1, p) before Python 3.8
+    gcd, x, y = euclidean(n % p, p)
+    assert gcd == 1, 'No modular multiplicative inverse exists gcd({}, {}) = {}'.format(n, p, gcd)
+    return x % p
+
+def batch_modinverse(values, p):
+    """Returns the inverses of all values mod p with one inversion (Montgomery's trick)"""
+    if len(values) == 0:
+        return []
+    prefix = [values[0] % p]
+    for v in values[1:]:
+        prefix.append((prefix[-1] * v) % p)
+    inv = modinverse(prefix[-1], p)
+    ret = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        ret[i] = (inv * prefix[i - 1]) % p
+        inv = (inv * values[i]) % p
+    ret[0] = inv
+    return ret
+
+def batch_modinverse_checked(values, p):
+    """Returns the inverses of all values mod p, None where gcd(value, p) != 1
+
+    One inversion and 3(n - 1) multiplications when everything is
+    invertible; otherwise the values sharing a factor with p are picked
+    out and the rest go through a second pass.
+    """
+    ret = [None] * len(values)
+    idx = [i for i, v in enumerate(values) if v % p != 0]
+    while len(idx) > 0:
+        prefix = [values[idx[0]] % p]
+        for i in idx[1:]:
+            prefix.append((prefix[-1] * values[i]) % p)
+        if math.gcd(prefix[-1], p) == 1:
+            break
+        idx = [i for i in idx if math.gcd(values[i], p) == 1]
+    else:
+        return ret
+    inv = modinverse(prefix[-1], p)
+    for k in range(len(idx) - 1, 0, -1):
+        ret[idx[k]] = (inv * prefix[k - 1]) % p
+        inv = (inv * values[idx[k]]) % p
+    ret[idx[0]] = inv
+    return ret
+
+def isqrt(n):
+    """Returns floor(sqrt(n))"""
+    if n < 0:
+        assert False, 'Square root of a negative number'
+    if n == 0:
+        return 0
+    x = 1 << ((n.bit_length() + 1) // 2)
+    while True:
+        y = (x + n // x) // 2
+        if y >= x:
+            return x
+        x = y
+
+def legendre(a, p):
+    """Returns the Legendre symbol (a/p) as -1, 0 or 1"""
+    ls = pow(a, (p - 1) // 2, p)
+    return -1 if ls == p - 1 else ls
+
+def modsqrt(a, p):
+    """Returns r where r * r = a mod p (Tonelli-Shanks), p an odd prime"""
+    a %= p
+    if a == 0:
+        return 0
+    assert legendre(a, p) == 1, 'No modular square root exists'
+    if p % 4 == 3:
+        return pow(a, (p + 1) // 4, p)
+    q, s = p - 1, 0
+    while q % 2 == 0:
+        q, s = q // 2, s + 1
+    z = 2
+    while legendre(z, p) != -1:
+        z += 1
+    m, c, t, r = s, pow(z, q, p), pow(a, q, p), pow(a, (q + 1) // 2, p)
+    while t != 1:
+        i, t2 = 0, t
+        while t2 != 1:
+            t2, i = (t2 * t2) % p, i + 1
+        b = pow(c, 1 << (m - i - 1), p)
+        m, c = i, (b * b) % p
+        t, r = (t * c) % p, (r * b) % p
+    return r
+
+def is_probable_prime(n, rounds=32):
+    """Miller-Rabin primality test"""
+    if n < 2:
+        return False
+    for q in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % q == 0:
+            return n == q
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    rng = random.Random(n)
+    for i in range(rounds):
+        x = pow(rng.randrange(2, n - 1), d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for j in range(s - 1):
+            x = (x * x) % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def pollard_brent(n, limit=1 << 20):
+    """Returns a non-trivial factor of composite n, or None within limit steps"""
+    if n % 2 == 0:
+        return 2
+    rng = random.Random(n)
+    for attempt in range(8):
+        y, c, m = rng.randrange(1, n), rng.randrange(1, n), 128
+        g, r, q = 1, 1, 1
+        steps = 0
+        while g == 1 and steps < limit:
+            x = y
+            for i in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for i in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = (q * abs(x - y)) % n
+                g = math.gcd(q, n)
+                k += m
+            steps += r
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if 1 < g < n:
+            return g
+    return None
+
+def factorize(n):
+    """Returns the prime factors of n with multiplicity
+
+    Trial division followed by Pollard rho; a cofactor rho cannot split is
+    returned as if it were prime.
+    """
+    factors = []
+    for q in range(2, 1 << 12):
+        while n % q == 0:
+            factors.append(q)
+            n //= q
+        if q * q > n:
+            break
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_probable_prime(m):
+            factors.append(m)
+            continue
+        d = pollard_brent(m)
+        if d is None:
+            factors.append(m)
+        else:
+            stack.extend([d, m // d])
+    return sorted(factors)
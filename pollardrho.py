@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 
 import sys, getopt, random, math
+from numtheory import modinverse
 
 def main(argv):
 
@@ -70,7 +71,7 @@ def main(argv):
             if len(args) != 1:
                 print_usage_and_exit(1)
             x = int(args[0])
-            if (alpha**x) % modulo == beta % modulo:
+            if pow(alpha, x, modulo) == beta % modulo:
                 print('Pass')
             else:
                 print('Fail')
@@ -78,27 +79,6 @@ def main(argv):
             print('Invalid command `{}`'.format(command))
 
 
-def euclidean(a, b, verbose=False):
-    """Returns (gcd, x, y) where a * x + b * y = gcd"""
-    x2, x1 = 0, 1
-    y2, y1 = 1, 0
-    r2, r1 = b, a
-    while r2 != 0:
-        q = int(r1 / r2)
-        r1, r2 = r2, r1 - (q * r2)
-        x1, x2 = x2, x1 - (q * x2)
-        y1, y2 = y2, y1 - (q * y2)
-    return r1, x1, y1
-
-
-def modular_inverse(n, p, verbose=False):
-    """Returns ninv where n * ninv = 1 mod p"""
-    gcd, x, y = euclidean(n, p, verbose)
-    assert (n * x + p * y) % p == gcd
-    assert gcd == 1, 'No modular multiplicative inverse exists gcd({}, {}) = {}'.format(n, p, gcd)
-    return x % p
-
-
 def gen_subgroup(alpha, modulo):
     group = [1]
     element = alpha
@@ -165,7 +145,7 @@ def solve(alpha, beta, modulo, a0=1, b0=1):
             if xi == x2i:
                 l = (bj - b2j) % len(group)
                 r = (a2j - aj) % len(group)
-                z = (modular_inverse(l, len(group)) * r) % len(group)
+                z = (modinverse(l, len(group)) * r) % len(group)
                 debug('(bj - b2j)^-1 * (a2j - aj) mod len(subgroup) = {}'.format(z))
                 if z == 0:
                     continue
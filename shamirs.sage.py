@@ -72,7 +72,7 @@ def shamirs(p, P, users, verbose=False):
 
 
 def modular_inverse(n, p):
-    return n**(p-_sage_const_2 ) % p
+    return inverse_mod(n, p)
 
 
 def solve_shamirs(userkeys, p, verbose=False):
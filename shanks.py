@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 
 import sys, getopt, math
+from numtheory import modinverse
 
 def main(argv):
 
@@ -56,7 +57,7 @@ def main(argv):
         elif command == 'mu':
             assert alpha and modulo, 'Invalid alpha/modulo'
             m = calc_m(modulo)
-            print(modular_inverse((alpha**m) % modulo, modulo))
+            print(modinverse(pow(alpha, m, modulo), modulo))
         elif command == 'ceilsqrt':
             assert modulo, 'Invalid modulo'
             print(calc_m(modulo))
@@ -66,10 +67,6 @@ def main(argv):
         print_usage_and_exit(1)
 
 
-def modular_inverse(a, m):
-    return (a**(m - 2)) % m
-
-
 def calc_m(modulo):
     res = int(math.sqrt(modulo))
     while res * res < modulo:
@@ -78,7 +75,7 @@ def calc_m(modulo):
 
 
 def calc_itable(alpha, beta, m, modulo):
-    mu = modular_inverse((alpha**m) % modulo, modulo)
+    mu = modinverse(pow(alpha, m, modulo), modulo)
     itable = {0: beta}
     res = beta
     for i in range(1, m):